@@ -9,16 +9,15 @@ load_dotenv('.env')
 
 # Import utility functions and constants
 from utils import (
-    update_single_competitor_async,
-    generate_top_changes_summary_async,
+    run_competitor_refresh_async,
     populate_notion_db_from_folder,
-    append_text_to_notion_page_async,
-    discover_new_competitors_async,
+    build_text_section_blocks,
+    build_paragraph_blocks,
+    append_blocks_to_notion_page_async,
     dedupe_sources_preserve_order,
     build_inline_source_refs
 )
 from notion_client import AsyncClient
-from vertexai.generative_models import GenerationConfig
 
 # --- Config parameters ---
 NOTION_API_TOKEN = os.getenv("NOTION_API_TOKEN")
@@ -84,67 +83,54 @@ async def main_update():
 
     print(f"Found {len(json_files)} competitors to check for updates...")
 
-    # Create a list of all tasks to run in parallel
-    update_tasks = []
-    for json_file in json_files:
-        update_tasks.append(
-            update_single_competitor_async(
-                json_file_path=json_file,
-                company_context=COMPANY_CONTEXT
-            )
-        )
-
-    discovery_task = asyncio.create_task(
-        discover_new_competitors_async(
-            days_ago=DISCOVERY_LOOKBACK_DAYS,
-            company_context=COMPANY_CONTEXT,
-            existing_competitors=existing_competitor_names
-        )
+    # --- 3. Update, Summarize and Discover Concurrently ---
+    # Discovery runs alongside the updates; the top 10 summary starts as soon as the updates finish.
+    successful_updates, top_changes_summary, newly_discovered_competitors = await run_competitor_refresh_async(
+        json_file_paths=json_files,
+        existing_competitors=existing_competitor_names,
+        company_context=COMPANY_CONTEXT,
+        days_ago=DISCOVERY_LOOKBACK_DAYS
     )
 
-    # Run all update tasks and gather results
-    update_results = await asyncio.gather(*update_tasks)
-    newly_discovered_competitors = await discovery_task
-
-    # --- 3. Process Update Results ---
-    successful_updates = [res for res in update_results if res is not None]
-    change_summaries = [summary for _, summary in successful_updates] if successful_updates else []
-
-    # --- 4. Generate Top 10 Summary ---
-    top_changes_summary = "No significant competitor updates found in this run."
-    if change_summaries:
-        print("\nGenerating final executive summary of top changes...")
-        top_changes_summary = await generate_top_changes_summary_async(
-            all_changes=change_summaries,
-            company_context=COMPANY_CONTEXT
-        )
-
     print("\n--- EXECUTIVE SUMMARY ---")
     print(top_changes_summary)
     print("-------------------------\n")
 
-    # --- 5. Update Notion Database (if any updates were successful) ---
+    # One Notion client (and connection pool) serves both the database upload and the page update.
+    async with AsyncClient(auth=NOTION_API_TOKEN) as notion_client:
+        await _publish_to_notion(notion_client, successful_updates, top_changes_summary, newly_discovered_competitors)
+
+    print("\nUpdate and Discovery process complete!")
+
+
+async def _publish_to_notion(notion_client, successful_updates, top_changes_summary, newly_discovered_competitors):
+    """Uploads the refreshed competitors to the Notion database and appends the run's summaries to the page."""
+    # --- 4. Update Notion Database (if any updates were successful) ---
     if successful_updates:
         print("Updating Notion database with the latest information...")
         await populate_notion_db_from_folder(
             output_folder=OUTPUT_FOLDER,
             database_id=NOTION_DATABASE_ID,
-            notion_token=NOTION_API_TOKEN
+            notion_token=NOTION_API_TOKEN,
+            notion_client=notion_client
         )
     else:
         print("No successful updates, skipping Notion database population.")
 
-    # --- 6. Append Summaries to Notion Page ---
+    # --- 5. Append Summaries to Notion Page ---
+    # The executive summary goes out on its own, so a problem with the per-competitor
+    # sections cannot cost us the summary; those sections are then flushed in one go.
     print("Appending summaries to the Notion page...")
-    notion_client = AsyncClient(auth=NOTION_API_TOKEN)
 
     update_summary_title = f"Competitor Intelligence Update - {datetime.now().strftime('%B %d, %Y')}"
-    await append_text_to_notion_page_async(
+    if await append_blocks_to_notion_page_async(
         notion_client=notion_client,
         page_id=NOTION_SUMMARY_PAGE_ID,
-        title=update_summary_title,
-        content=top_changes_summary
-    )
+        blocks=build_text_section_blocks(update_summary_title, top_changes_summary)
+    ):
+        print("Successfully appended the executive summary to the Notion page.")
+
+    blocks_to_append = []
 
     # Append compact competitor updates with inline source links [1] [2] ...
     if successful_updates:
@@ -164,24 +150,17 @@ async def main_update():
                     data = {}
                 unique_sources = dedupe_sources_preserve_order(data.get("Research_Sources") or [])
 
-                # Build paragraph with summary and inline linked refs
+                # Build paragraph(s) with summary and inline linked refs, split to Notion's limits
                 rich_text_parts = [{"type": "text", "text": {"content": summary_text}}]
                 if unique_sources:
                     rich_text_parts.append({"type": "text", "text": {"content": "  Sources: "}})
                     rich_text_parts.extend(build_inline_source_refs(unique_sources))
 
-                updates_children.append({
-                    "object": "block",
-                    "type": "paragraph",
-                    "paragraph": {"rich_text": rich_text_parts}
-                })
+                updates_children.extend(build_paragraph_blocks(rich_text_parts))
 
-            await notion_client.blocks.children.append(
-                block_id=NOTION_SUMMARY_PAGE_ID,
-                children=updates_children
-            )
+            blocks_to_append.extend(updates_children)
         except Exception as e:
-            print(f"Warning: Failed to append competitor updates with inline source links: {e}")
+            print(f"Warning: Failed to build competitor updates with inline source links: {e}")
 
     if newly_discovered_competitors:
         discovery_summary_title = "Potential New Competitors Discovered"
@@ -190,18 +169,27 @@ async def main_update():
             "If relevant, add them to the 'competitors.csv' file for the next full research run:\n\n- " +
             "\n- ".join(newly_discovered_competitors)
         )
-        await append_text_to_notion_page_async(
-            notion_client=notion_client,
-            page_id=NOTION_SUMMARY_PAGE_ID,
-            title=discovery_summary_title,
-            content=discovery_content
-        )
+        blocks_to_append.extend(build_text_section_blocks(discovery_summary_title, discovery_content, subtitle=None))
+
+    if blocks_to_append and await append_blocks_to_notion_page_async(
+        notion_client=notion_client,
+        page_id=NOTION_SUMMARY_PAGE_ID,
+        blocks=blocks_to_append
+    ):
+        print("Successfully appended competitor updates to the Notion page.")
+
+    if newly_discovered_competitors:
         print(f"Appended {len(newly_discovered_competitors)} new potential competitors to the Notion page.")
     else:
         print("No new competitors were discovered in this run.")
 
-    print("\nUpdate and Discovery process complete!")
-
 
 if __name__ == "__main__":
-    asyncio.run(main_update())
\ No newline at end of file
+    # uvloop is a faster drop-in event loop for the many concurrent API calls; it isn't
+    # available on Windows, where the default asyncio loop is used.
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main_update())
+    else:
+        uvloop.run(main_update())
\ No newline at end of file
@@ -1,17 +1,30 @@
 import asyncio
-from typing import List, Dict, Any
+import contextlib
+from typing import List, Dict, Any, Iterator
 import google.auth # type: ignore
 import sys, os
+import functools
+import hashlib
+import itertools
 import json
+import random
+import re
+import string
 import uuid
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from typing import Tuple
 import vertexai
 import vertexai.generative_models as generative_models
+from vertexai.batch_prediction import BatchPredictionJob
+from vertexai.caching import CachedContent
 from vertexai.generative_models import Tool, GenerationConfig
-from notion_client import AsyncClient, Client # type: ignore
+from google.cloud import storage
+from notion_client import AsyncClient # type: ignore
 from notion_client.errors import APIResponseError
-from tenacity import retry, wait_random_exponential
+from google.api_core.exceptions import (
+    BadGateway, DeadlineExceeded, GatewayTimeout, GoogleAPIError, InternalServerError,
+    ResourceExhausted, ServiceUnavailable, TooManyRequests
+)
 
 # Load configuration from config.json (required)
 try:
@@ -44,44 +57,345 @@ except Exception as _e:
     print("Please ensure config.json exists and has valid 'csv_schema' and 'competitor_type_definitions' in the 'initial_research' section.")
     sys.exit(1)
 
+# Prompt fragments derived from the configuration; they never change after load.
+_DEFINITIONS_TEXT = "\n".join(f"- **{name}:** {desc}" for name, desc in COMPETITOR_TYPE_DEFINITIONS.items())
+_CSV_SCHEMA_JSON = json.dumps(CSV_SCHEMA, indent=2)
+# COMPETITOR_TYPES keeps the configured order for the Notion select options; membership checks use the set.
+_COMPETITOR_TYPES_SET = frozenset(COMPETITOR_TYPES)
+
 
 # Add the root directory to the Python path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 
+# --- Gemini Model & Request Configuration ---
+
+GEMINI_MODEL_NAME = "gemini-2.5-flash"
+
+# Shared, read-only request building blocks, created once instead of per call.
+_SEARCH_TOOL = Tool.from_dict({"google_search": {}})
+# The JSON-producing calls all use Google Search grounding, which gemini-2.5 models don't
+# support together with response_mime_type="application/json" / response_schema. JSON is
+# therefore requested in the prompt and recovered by _loads_llm_json.
+_RESEARCH_CONFIG = GenerationConfig(temperature=0.1, top_p=1.0)
+_UPDATE_CONFIG = GenerationConfig(temperature=0.2, top_p=1.0)
+_DISCOVERY_CONFIG = GenerationConfig(temperature=0.5, top_p=1.0)
+
+@functools.lru_cache(maxsize=1)
+def _ensure_vertex() -> None:
+    """Initializes Vertex AI once per process (credential discovery and client setup are not free)."""
+    vertexai.init(project=os.getenv("GOOGLE_CLOUD_PROJECT"), location="us-central1")
+
+@functools.lru_cache(maxsize=1)
+def _get_model() -> generative_models.GenerativeModel:
+    """
+    Returns the shared Gemini model. It is created on first use rather than at import,
+    since building it resolves the Vertex AI project and credentials.
+    """
+    _ensure_vertex()
+    return generative_models.GenerativeModel(GEMINI_MODEL_NAME)
+
+
+# --- Concurrency Limits ---
+
+# Caps the number of in-flight Gemini requests across all callers so large fan-outs
+# queue locally instead of triggering 429s and retry storms on the API side.
+# Set via config.json (initial_research.max_concurrency), overridable with LLM_MAX_CONCURRENCY.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY") or initial_research_cfg.get("max_concurrency", 8))
+_LLM_SEM = asyncio.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+# Upper bound for a single Gemini request (search-grounded research can take a few minutes).
+LLM_REQUEST_TIMEOUT_SECONDS = float(os.getenv("LLM_REQUEST_TIMEOUT_SECONDS") or 240)
+
+@contextlib.asynccontextmanager
+async def _llm_slot():
+    """
+    Holds one of the shared LLM concurrency slots for a request, raising TimeoutError after
+    LLM_REQUEST_TIMEOUT_SECONDS so a stuck connection can't keep the slot forever.
+    """
+    async with _LLM_SEM:
+        async with asyncio.timeout(LLM_REQUEST_TIMEOUT_SECONDS):
+            yield
+
+# Notion allows an average of 3 requests per second per integration.
+NOTION_MAX_CONCURRENCY = 3
+NOTION_MAX_RETRIES = 4
+
+class _RateController:
+    """
+    AIMD (additive-increase, multiplicative-decrease) concurrency limiter.
+    The limit grows by one after a full window of successful calls and is halved
+    on every rate-limit response, so a batch settles just under the API's capacity.
+    """
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: int | None = None):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum or initial * 2
+        self._in_flight = 0
+        self._successes = 0
+        self._cond = asyncio.Condition()
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    def on_success(self) -> None:
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.maximum:
+            self.limit += 1
+            self._successes = 0
+
+    def on_rate_limit(self) -> None:
+        self.limit = max(self.minimum, self.limit // 2)
+        self._successes = 0
+
+async def semaphore_gather(*coros, limit: int = LLM_MAX_CONCURRENCY, return_exceptions: bool = False) -> List[Any]:
+    """
+    Same as asyncio.gather, but runs at most `limit` of the given coroutines at a time.
+    Results are returned in the same order as the coroutines were passed.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def _bounded(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(_bounded(c) for c in coros), return_exceptions=return_exceptions)
+
+
 # --- LLM Based Competitor Research ---
 
-@retry(wait=wait_random_exponential(multiplier=1, max=120))
-async def research_competitor_to_json(
-    competitor_name: str, 
-    output_folder: str,
-    company_context: str,
-    request_args: Dict[str, Any] = None
-) -> str | None:
+def _extract_text(response: generative_models.GenerationResponse) -> str:
     """
-    Researches a single competitor using an LLM and outputs data as a JSON object
-    matching the global CSV_SCHEMA. Saves the JSON to a file.
-    Returns the file path if successful, None otherwise.
+    Returns the full text of the first candidate, concatenating multipart responses.
+    (response.text is not used: it is recomputed on every access and rejects multipart content.)
     """
-    # Initialize Vertex AI for this async call (following article pattern)
-    vertexai.init(project=os.getenv("GOOGLE_CLOUD_PROJECT"), location="us-central1")
-    
-    output_file_path = os.path.join(output_folder, f"{competitor_name.replace(' ', '_').replace('/', '_')}.json")
-    os.makedirs(os.path.dirname(output_file_path), exist_ok=True)
+    if not response.candidates:
+        raise ValueError("Gemini returned no candidates (the response may have been blocked).")
+    return "".join(part.text for part in response.candidates[0].content.parts).strip()
+
+# A candidate that ends with any other reason was cut off or blocked.
+_COMPLETE_FINISH_REASONS = (
+    generative_models.FinishReason.FINISH_REASON_UNSPECIFIED,
+    generative_models.FinishReason.STOP,
+)
+
+class _IncompleteResponseError(ValueError):
+    """Gemini stopped before finishing its answer; `finish_reason` is None if nothing was returned."""
+
+    def __init__(self, finish_reason: generative_models.FinishReason | None):
+        self.finish_reason = finish_reason
+        if finish_reason is None:
+            super().__init__("Gemini returned no candidates (the response may have been blocked).")
+        else:
+            super().__init__(f"Gemini stopped generating early (finish reason: {finish_reason.name}).")
 
-    # Generate a UUID for the competitor and current date
-    competitor_id = str(uuid.uuid4())
-    current_date = datetime.now().strftime("%Y-%m-%d")
+    @property
+    def truncated(self) -> bool:
+        """True if the answer only ran out of output tokens, rather than being blocked."""
+        return self.finish_reason == generative_models.FinishReason.MAX_TOKENS
 
-    # Format the definitions for inclusion in the prompt
-    definitions_text = "\n".join(f"- **{name}:** {desc}" for name, desc in COMPETITOR_TYPE_DEFINITIONS.items())
-    prompt = f"""**Role:** You are a Senior Market Research Analyst and expert detective working for a startup. You are skilled at using web searches to uncover hard-to-find details about competitor companies.
+def _check_finish_reason(candidate) -> None:
+    if candidate.finish_reason not in _COMPLETE_FINISH_REASONS:
+        raise _IncompleteResponseError(candidate.finish_reason)
+
+async def _collect_streamed_text(stream) -> str:
+    """
+    Concatenates the text of a streamed response, raising ValueError as soon as a chunk
+    reports that the answer was truncated or blocked instead of waiting for it to finish.
+    """
+    parts = []
+    async for chunk in stream:
+        if not chunk.candidates:
+            continue
+        candidate = chunk.candidates[0]
+        parts.extend(part.text for part in candidate.content.parts)
+        _check_finish_reason(candidate)
+    if not parts:
+        raise _IncompleteResponseError(None)
+    return "".join(parts).strip()
+
+def _strip_code_fence(text: str) -> str:
+    """Removes a surrounding ```json / ``` markdown fence from an LLM response, if present."""
+    text = text.strip()
+    if not text.startswith("```"):
+        # Common case: bare JSON, nothing to strip or copy.
+        return text
+    return text.removeprefix("```json").removeprefix("```").removesuffix("```").strip()
+
+def _loads_llm_json(text: str) -> Any:
+    """
+    Parses JSON produced by the LLM, tolerating a markdown fence and stray prose around
+    the object, so such answers don't cost another model call. Raises json.JSONDecodeError
+    (carrying the full text) if no JSON object can be recovered.
+    """
+    text = _strip_code_fence(text)
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as original_err:
+        start, end = text.find("{"), text.rfind("}")
+        if 0 <= start < end:
+            try:
+                return json.loads(text[start:end + 1])
+            except json.JSONDecodeError:
+                pass
+        raise original_err
+
+def _parse_json_response(response: generative_models.GenerationResponse) -> Any:
+    """Extracts the response text and parses it as JSON, which requires a complete answer."""
+    if not response.candidates:
+        raise _IncompleteResponseError(None)
+    _check_finish_reason(response.candidates[0])
+    return _loads_llm_json(_extract_text(response))
+
+def _require_json_object(data: Any) -> Dict[str, Any]:
+    """Returns `data` if it is a JSON object; otherwise raises ValueError so it is retried like a parse error."""
+    if not isinstance(data, dict):
+        raise ValueError(f"Expected a JSON object but the model returned {type(data).__name__}.")
+    return data
+
+def _retry_after_seconds(error: Exception) -> float | None:
+    """Returns the server-suggested wait (Retry-After) carried by an API error, if any."""
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is None:
+        headers = getattr(error, "headers", None) or getattr(getattr(error, "response", None), "headers", None)
+        if headers:
+            retry_after = headers.get("retry-after")
+    try:
+        return float(retry_after) if retry_after is not None else None
+    except (TypeError, ValueError):
+        return None
+
+def _compute_backoff(error: Exception, attempt: int, max_delay: float = 30.0) -> float:
+    """
+    Seconds to wait before retrying after `error` on the given (1-based) attempt.
+    Parse errors are retried immediately, since waiting won't change the model's output
+    (callers amend the prompt instead); API errors use jittered exponential backoff,
+    honouring Retry-After when provided.
+    """
+    if isinstance(error, ValueError):  # includes json.JSONDecodeError
+        return 0
+    retry_after = _retry_after_seconds(error)
+    if retry_after is not None:
+        return min(retry_after, max_delay)
+    base_delay = 2 ** attempt
+    if isinstance(error, (TooManyRequests, ResourceExhausted)):
+        # Quota needs longer to recover than a transient 5xx or timeout.
+        base_delay *= 2
+    return min(base_delay + random.uniform(0, 1), max_delay)
+
+# Transient API failures worth retrying: 429, 500, 502, 503 and 504.
+_TRANSIENT_API_ERRORS = (
+    TooManyRequests, ResourceExhausted, InternalServerError, BadGateway,
+    ServiceUnavailable, GatewayTimeout, DeadlineExceeded
+)
+RESEARCH_MAX_RETRIES = 5
+
+# Appended to the research prompt when the previous answer was unusable, so the retry
+# is not the identical request that just failed.
+_RESEARCH_JSON_CORRECTION_SUFFIX = """
+    **Correction:** Your previous answer could not be parsed. Reply with ONLY the single JSON object described above, with no surrounding text.
+    """
+_RESEARCH_BREVITY_SUFFIX = """
+    **Correction:** Your previous answer was cut off because it was too long. Reply with the same JSON object, but keep every text field to one or two short sentences and cite only the most important sources.
+    """
+
+def _append_to_prompt(prompt: str | List[str], suffix: str) -> str | List[str]:
+    # Multipart prompts get a new part, so the shared prefix stays byte-identical for caching.
+    return [*prompt, suffix] if isinstance(prompt, list) else prompt + suffix
+
+async def _generate_competitor_json(
+    model: generative_models.GenerativeModel,
+    prompt: str | List[str],
+    request_args: Dict[str, Any],
+    competitor_name: str
+) -> Dict[str, Any]:
+    """
+    Runs the research generation and parses the response as JSON.
+    Transient API errors are retried with jittered exponential backoff (or the server's
+    Retry-After). Unparseable or truncated answers are retried at once with a correction
+    appended to the prompt; a blocked answer (e.g. SAFETY) would only be blocked again,
+    so it is raised right away, as is any other error, or the last one once retries run out.
+    """
+    attempt = 0
+    current_prompt = prompt
+    while True:
+        try:
+            async with _llm_slot():
+                if request_args.get("stream"):
+                    stream = await model.generate_content_async(current_prompt, **request_args)
+                    return _require_json_object(_loads_llm_json(await _collect_streamed_text(stream)))
+                response_data = await model.generate_content_async(current_prompt, **request_args)
+            return _require_json_object(_parse_json_response(response_data))
+        except (ValueError, TimeoutError, *_TRANSIENT_API_ERRORS) as e:  # ValueError includes json.JSONDecodeError
+            if isinstance(e, _IncompleteResponseError) and not e.truncated:
+                raise
+            attempt += 1
+            if attempt > RESEARCH_MAX_RETRIES:
+                raise
+            if isinstance(e, _IncompleteResponseError):
+                current_prompt = _append_to_prompt(prompt, _RESEARCH_BREVITY_SUFFIX)
+            elif isinstance(e, ValueError):
+                current_prompt = _append_to_prompt(prompt, _RESEARCH_JSON_CORRECTION_SUFFIX)
+            delay = _compute_backoff(e, attempt, max_delay=60.0)
+            print(f"Attempt {attempt} for {competitor_name} failed: {e}. Retrying in {delay:.1f}s...")
+            await asyncio.sleep(delay)
+
+def _competitor_json_path(output_folder: str, competitor_name: str) -> str:
+    return os.path.join(output_folder, f"{competitor_name.replace(' ', '_').replace('/', '_')}.json")
+
+def _filter_research_candidates(
+    competitors_list: List[str],
+    output_folder: str,
+    existing_file_names: List[str]
+) -> Tuple[List[str], List[str]]:
+    """
+    Drops names that would waste an LLM call: blanks, names with no letters or digits,
+    case-insensitive duplicates and competitors already saved in `output_folder`
+    (whose directory listing is `existing_file_names`).
+    Returns (names to research, paths of existing research files that were skipped).
+    """
+    existing_files = {f.casefold(): f for f in existing_file_names if f.endswith('.json')}
+    seen = set()
+    to_research, existing_paths = [], []
+    for raw_name in competitors_list:
+        name = raw_name.strip()
+        if len(name) < 2 or not any(c.isalnum() for c in name):
+            print(f"Skipping invalid competitor name: {raw_name!r}")
+            continue
+        file_name = os.path.basename(_competitor_json_path(output_folder, name)).casefold()
+        if file_name in seen:
+            continue
+        seen.add(file_name)
+        if file_name in existing_files:
+            print(f"Skipping {name}: already researched ({existing_files[file_name]}).")
+            existing_paths.append(os.path.join(output_folder, existing_files[file_name]))
+        else:
+            to_research.append(name)
+    return to_research, existing_paths
+
+@functools.lru_cache(maxsize=8)
+def _research_prompt_prefix(company_context: str) -> str:
+    """
+    The competitor-independent part of the research prompt. It is built once per company
+    context and kept byte-identical across competitors, so Gemini's implicit prompt caching
+    can reuse it; only the short per-competitor tail changes between requests.
+    """
+    return f"""**Role:** You are a Senior Market Research Analyst and expert detective working for a startup. You are skilled at using web searches to uncover hard-to-find details about competitor companies.
 
     **Your Company's Context:**
     {company_context}
 
     **Primary Objective:**
-    Conduct a deep-dive analysis of the competitor '{competitor_name}'. Your goal is to fill out EVERY field in the requested JSON schema with accurate, well-researched information. You must also provide a critical competitive assessment from your company's strategic perspective.
+    Conduct a deep-dive analysis of the competitor named at the end of these instructions. Your goal is to fill out EVERY field in the requested JSON schema with accurate, well-researched information. You must also provide a critical competitive assessment from your company's strategic perspective.
 
     **IMPORTANT: Research Methodology & Instructions**
 
@@ -97,13 +411,13 @@ async def research_competitor_to_json(
         *   `Opportunity_For_Company`: What strategic gaps in product, marketing, or target audience does this competitor leave that your company can exploit?
 
     **CRITICAL STEP 1: Competitor Type Classification**
-    Before generating the JSON, you must first classify the competitor. Analyze '{competitor_name}' based on its primary product, target audience (firm owners vs. managers), and how it uses technology (especially AI). Using the definitions below, select the SINGLE most accurate category.
+    Before generating the JSON, you must first classify the competitor. Analyze it based on its primary product, target audience (firm owners vs. managers), and how it uses technology (especially AI). Using the definitions below, select the SINGLE most accurate category.
 
     **Category Definitions:**
-    {definitions_text}
+    {_DEFINITIONS_TEXT}
 
     **CRITICAL STEP 2: JSON Output Generation**
-    For the competitor '{competitor_name}', gather information for all the fields listed below. Present your findings STRICTLY as a single, valid JSON object. The keys MUST EXACTLY match the field names provided.
+    For the competitor, gather information for all the fields listed below. Present your findings STRICTLY as a single, valid JSON object. The keys MUST EXACTLY match the field names provided.
 
     *   **Source Citation:** For every piece of data, you MUST add the source URL to the `Research_Sources` field. Create a comprehensive list.
         ```
@@ -115,284 +429,590 @@ async def research_competitor_to_json(
     *   **Debrief Field:** Provide a single, concise sentence summarizing the company's core offering from the perspective of a potential customer.
 
     **Fields to Research (JSON Keys):**
-    {json.dumps(CSV_SCHEMA, indent=2)}
+    {_CSV_SCHEMA_JSON}
 
     **Final Output Format Instructions:**
     *   The output MUST be a single, valid JSON object.
     *   Do NOT include any explanatory text or markdown formatting before or after the JSON object.
     *   Ensure all keys from the schema are present.
     *   For the "Type" field, use EXACTLY one of the predefined competitor types.
+    """
+
+def _build_research_prompt(competitor_name: str, company_context: str) -> List[str]:
+    """
+    Builds the deep-dive research prompt for a single competitor as two parts:
+    the shared, cacheable prefix and the competitor-specific tail.
+    """
+    tail = f"""**Competitor to research:** '{competitor_name}'
 
     Now, begin your research for '{competitor_name}' and generate the complete JSON object.
     """
+    return [_research_prompt_prefix(company_context), tail]
+
+# With USE_CONTEXT_CACHE=1, a research run stores the shared prompt prefix and search tool in
+# an explicit Gemini context cache (billed at a reduced rate per request) and only sends each
+# competitor's tail. The cache is deleted when the run ends; the TTL is a safety net.
+CONTEXT_CACHE_TTL = timedelta(hours=2)
+
+async def _create_research_cache(company_context: str) -> CachedContent | None:
+    """Creates the context cache for a research run, or returns None if it can't be created."""
+    _ensure_vertex()
+    try:
+        return await asyncio.to_thread(
+            CachedContent.create,
+            model_name=GEMINI_MODEL_NAME,
+            system_instruction=_research_prompt_prefix(company_context),
+            tools=[_SEARCH_TOOL],
+            ttl=CONTEXT_CACHE_TTL
+        )
+    except Exception as e:
+        # e.g. the prefix is below the model's minimum cacheable size; implicit caching still applies.
+        print(f"Warning: Could not create a context cache for the research prompt, sending it in full: {e}")
+        return None
+
+@functools.lru_cache(maxsize=4)
+def _get_cached_model(cached_content_name: str) -> generative_models.GenerativeModel:
+    return generative_models.GenerativeModel.from_cached_content(cached_content=cached_content_name)
+
+def _finalize_research_data(json_data: Dict[str, Any], competitor_name: str) -> Dict[str, Any]:
+    """Adds the system-generated fields and validates the Type and Research_Sources of a research result."""
+    # Generate a UUID for the competitor and current date
+    competitor_id = str(uuid.uuid4())
+    current_date = datetime.now().strftime("%Y-%m-%d")
+
+    # Add system-generated fields
+    json_data["CompetitorID"] = competitor_id
+    json_data["DateAdded"] = current_date
+    json_data["LastUpdated"] = current_date
+    
+    # Validate competitor type
+    competitor_type = json_data.get("Type")
+    # The model sometimes returns a list or dict here, which a set lookup can't hash.
+    if not (isinstance(competitor_type, str) and competitor_type in _COMPETITOR_TYPES_SET):
+        print(f"Warning: Invalid competitor type '{json_data.get('Type')}' for {competitor_name}. Using 'N/A'.")
+        json_data["Type"] = "N/A"
+    
+    # Ensure Research_Sources is a list of objects with url and description
+    sources = json_data.get("Research_Sources", [])
+    if not isinstance(sources, list):
+        json_data["Research_Sources"] = []
+    else:
+        # Validate each source has required fields
+        valid_sources = []
+        for source in sources:
+            if isinstance(source, dict) and "url" in source and "description" in source:
+                valid_sources.append(source)
+        json_data["Research_Sources"] = valid_sources
+    return json_data
+
+async def research_competitor_to_json(
+    competitor_name: str, 
+    output_folder: str,
+    company_context: str,
+    request_args: Dict[str, Any] = None,
+    research_cache: CachedContent | None = None
+) -> str | None:
+    """
+    Researches a single competitor using an LLM and outputs data as a JSON object
+    matching the global CSV_SCHEMA. Saves the JSON to a file.
+    If `research_cache` (see _create_research_cache) is given, only the competitor-specific
+    part of the prompt is sent.
+    Returns the file path if successful, None otherwise.
+    """
+    output_file_path = _competitor_json_path(output_folder, competitor_name)
+    os.makedirs(os.path.dirname(output_file_path), exist_ok=True)
 
-    model = generative_models.GenerativeModel("gemini-2.5-flash")
+    prompt = _build_research_prompt(competitor_name, company_context)
+
+    model = _get_model()
 
     if request_args is None:
         # Configure default request args if none provided
-        # Using standard Google AI SDK format for tool configuration
-        search_tool = Tool.from_dict({
-            "google_search": {}  # Basic configuration without unsupported parameters
-        })
-        
-        config = GenerationConfig(
-            temperature=0.1,
-            top_p=1.0
-        )
-        
         request_args = {
-            "generation_config": config,
-            "tools": [search_tool],
-            "stream": False
+            "generation_config": _RESEARCH_CONFIG,
+            "tools": [_SEARCH_TOOL],
+            "stream": True
         }
 
-    max_retries = 3
+    if research_cache is not None:
+        # The shared prefix and the search tool are part of the cached content.
+        model = _get_cached_model(research_cache.resource_name)
+        prompt = prompt[-1]
+        request_args = {key: value for key, value in request_args.items() if key != "tools"}
 
-    for attempt in range(max_retries):
-        try:
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] Attempt {attempt + 1} to research {competitor_name}...")
-            
-            response_data = await model.generate_content_async(
-                [prompt],
-                **request_args
-            )
-            
-            # Correctly handle multipart responses by concatenating text parts
-            response_text = "".join(part.text for part in response_data.candidates[0].content.parts).strip()
-            
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]
-            if response_text.startswith("```"):
-                response_text = response_text[3:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
-            response_text = response_text.strip()
-            
-            try:
-                json_data = json.loads(response_text) # Try to parse
-                
-                # Add system-generated fields
-                json_data["CompetitorID"] = competitor_id
-                json_data["DateAdded"] = current_date
-                json_data["LastUpdated"] = current_date
-                
-                # Validate competitor type
-                if json_data.get("Type") not in COMPETITOR_TYPES:
-                    print(f"Warning: Invalid competitor type '{json_data.get('Type')}' for {competitor_name}. Using 'N/A'.")
-                    json_data["Type"] = "N/A"
-                
-                # Ensure Research_Sources is a list of objects with url and description
-                sources = json_data.get("Research_Sources", [])
-                if not isinstance(sources, list):
-                    json_data["Research_Sources"] = []
-                else:
-                    # Validate each source has required fields
-                    valid_sources = []
-                    for source in sources:
-                        if isinstance(source, dict) and "url" in source and "description" in source:
-                            valid_sources.append(source)
-                    json_data["Research_Sources"] = valid_sources
-                
-                # Write validated JSON
-                with open(output_file_path, "w") as f:
-                    json.dump(json_data, f, indent=2)
-                
-                print(f"[{datetime.now().strftime('%H:%M:%S')}] Successfully researched and saved data for {competitor_name} to {output_file_path}")
-                return output_file_path
-                
-            except json.JSONDecodeError as json_err:
-                print(f"LLM response for {competitor_name} is not valid JSON: {json_err}")
-                print(f"Raw response fragment: {response_text[:500]}...")
-                if attempt == max_retries - 1:
-                    with open(output_file_path + ".error.txt", "w") as f_err:
-                        f_err.write(response_text)
-                    print(f"LLM failed to produce valid JSON for {competitor_name} after {max_retries} attempts. Error log saved.")
-                    return None
-                print("Retrying due to invalid JSON...")
-                await asyncio.sleep(5 * (attempt + 1))
-                continue
-        
-        except Exception as e:
-            print(f"Attempt {attempt + 1} for {competitor_name} failed: An unexpected error occurred: {e}")
-            if attempt == max_retries - 1:
-                with open(output_file_path + ".fatal.txt", "w") as f_err:
-                    f_err.write(f"Fatal error during research: {e}\n\nFull Response:\n{response_data if 'response_data' in locals() else 'N/A'}")
-                print(f"Max retries reached for {competitor_name}. Skipping. Fatal error log saved.")
-                return None
-            print("Retrying...")
-            await asyncio.sleep(5 * (attempt + 1))
-    return None
+    try:
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] Researching {competitor_name}...")
+        json_data = await _generate_competitor_json(model, prompt, request_args, competitor_name)
+        json_data = _finalize_research_data(json_data, competitor_name)
+        # Write validated JSON off the event loop so in-flight LLM calls keep progressing
+        await asyncio.to_thread(_write_json_file, output_file_path, json_data)
+    except json.JSONDecodeError as json_err:
+        print(f"LLM response for {competitor_name} is not valid JSON: {json_err}")
+        print(f"Raw response fragment: {json_err.doc[:500]}...")
+        await asyncio.to_thread(_write_text_file, output_file_path + ".error.txt", json_err.doc)
+        print(f"LLM failed to produce valid JSON for {competitor_name} after {RESEARCH_MAX_RETRIES + 1} attempts. Error log saved.")
+        return None
+    except Exception as e:
+        print(f"Research for {competitor_name} failed: {e}")
+        await asyncio.to_thread(_write_text_file, output_file_path + ".fatal.txt", f"Fatal error during research: {e!r}")
+        print(f"Giving up on {competitor_name}. Fatal error log saved.")
+        return None
+
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] Successfully researched and saved data for {competitor_name} to {output_file_path}")
+    return output_file_path
 
 async def research_competitors_async(
     competitors_list: List[str],
     output_folder_path: str,
     company_context: str,
-    request_args: Dict[str, Any] = None
+    request_args: Dict[str, Any] = None,
+    force: bool = False
 ) -> List[str]:
     """
     Processes research for each competitor in parallel using global CSV_SCHEMA.
-    Returns a list of file paths for successfully processed competitors.
+    Duplicate or blank names are dropped, and competitors that already have a JSON file in
+    the output folder are not researched again unless `force` is set.
+    Set USE_BATCH_INFERENCE=1 to run everything as one Vertex AI batch job instead
+    (see research_competitors_batch_async), or USE_CONTEXT_CACHE=1 to serve the shared
+    prompt prefix from an explicit context cache.
+    Returns a list of file paths for successfully processed competitors; skipped ones are
+    only reported in the log.
     """
-    tasks = []
     os.makedirs(output_folder_path, exist_ok=True)
+    existing_file_names = [] if force else await asyncio.to_thread(os.listdir, output_folder_path)
+    competitors_list, existing_paths = _filter_research_candidates(
+        competitors_list, output_folder_path, existing_file_names
+    )
+    if existing_paths:
+        print(f"Skipped {len(existing_paths)} competitors that already have research files (pass force=True to redo them).")
+    if not competitors_list:
+        print("Nothing new to research.")
+        return []
+
+    if os.getenv("USE_BATCH_INFERENCE") == "1":
+        return await research_competitors_batch_async(competitors_list, output_folder_path, company_context)
+
+    # A fixed pool of workers pulls names from a shared iterator, so only as many research
+    # calls (and prompts) as the LLM concurrency limit are alive at any time, however long the list.
+    results_paths: List[str | None] = [None] * len(competitors_list)
+    pending = iter(enumerate(competitors_list))
+
+    research_cache = await _create_research_cache(company_context) if os.getenv("USE_CONTEXT_CACHE") == "1" else None
+
+    async def _worker() -> None:
+        for index, competitor_name in pending:
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] Starting research for: {competitor_name}")
+            # One failing competitor must not take its worker (and the rest of the queue) down.
+            try:
+                results_paths[index] = await research_competitor_to_json(
+                    competitor_name,
+                    output_folder_path,
+                    company_context=company_context,
+                    request_args=request_args,
+                    research_cache=research_cache
+                )
+            except Exception as e:
+                print(f"Unexpected error while researching {competitor_name}: {e!r}")
 
-    for competitor_name in competitors_list:
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] Queueing research for: {competitor_name}")
-        tasks.append(
-            research_competitor_to_json(
-                competitor_name,
-                output_folder_path,
-                company_context=company_context,
-                request_args=request_args
-            )
-        )
-    
-    results_paths = await asyncio.gather(*tasks)
+    try:
+        await asyncio.gather(*(_worker() for _ in range(min(LLM_MAX_CONCURRENCY, len(competitors_list)))))
+    finally:
+        if research_cache is not None:
+            try:
+                await asyncio.to_thread(research_cache.delete)
+            except Exception as e:
+                print(f"Warning: Could not delete context cache {research_cache.resource_name}: {e}")
     successful_paths = [path for path in results_paths if path is not None]
     print(f"Finished researching all competitors. {len(successful_paths)} successful out of {len(competitors_list)}.")
     return successful_paths
 
+# --- Batch Competitor Research (Vertex AI Batch Prediction) ---
+
+BATCH_POLL_INTERVAL_SECONDS = 30
+
+def _split_gcs_uri(gcs_uri: str) -> Tuple[str, str]:
+    """Splits gs://bucket/some/prefix into ("bucket", "some/prefix")."""
+    bucket_name, _, prefix = gcs_uri.removeprefix("gs://").partition("/")
+    return bucket_name, prefix.strip("/")
+
+def _save_batch_research_result(
+    record: Dict[str, Any],
+    tails_to_names: Dict[str, str],
+    output_folder: str
+) -> str | None:
+    """
+    Validates one line of batch prediction output and saves it like research_competitor_to_json would.
+    Returns the file path if successful, None otherwise.
+    """
+    try:
+        prompt_tail = record["request"]["contents"][0]["parts"][-1]["text"]
+    except (KeyError, IndexError, TypeError):
+        print("Warning: Skipping batch output line without a recognizable request.")
+        return None
+    competitor_name = tails_to_names.get(prompt_tail)
+    if competitor_name is None:
+        print("Warning: Skipping batch output line that doesn't match any submitted competitor.")
+        return None
+
+    output_file_path = _competitor_json_path(output_folder, competitor_name)
+    if record.get("status"):
+        print(f"Batch research for {competitor_name} failed: {record['status']}")
+        _write_text_file(output_file_path + ".fatal.txt", f"Fatal error during batch research: {record['status']}")
+        return None
+
+    try:
+        parts = record["response"]["candidates"][0]["content"]["parts"]
+        response_text = "".join(part.get("text", "") for part in parts)
+        json_data = _require_json_object(_loads_llm_json(response_text))
+    except json.JSONDecodeError as json_err:
+        print(f"LLM response for {competitor_name} is not valid JSON: {json_err}")
+        _write_text_file(output_file_path + ".error.txt", json_err.doc)
+        return None
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        print(f"Batch response for {competitor_name} has an unexpected format: {e!r}")
+        return None
+
+    try:
+        json_data = _finalize_research_data(json_data, competitor_name)
+        _write_json_file(output_file_path, json_data)
+    except Exception as e:
+        print(f"Could not save batch research for {competitor_name}: {e}")
+        return None
+    print(f"Successfully saved batch research for {competitor_name} to {output_file_path}")
+    return output_file_path
+
+async def research_competitors_batch_async(
+    competitors_list: List[str],
+    output_folder_path: str,
+    company_context: str,
+    gcs_uri: str | None = None
+) -> List[str]:
+    """
+    Researches all competitors with a single Vertex AI batch prediction job instead of one
+    online request each: batch requests are billed at a discount and have their own quota,
+    but results can take from minutes to hours. Prompts are uploaded as JSONL under gcs_uri
+    (defaults to the BATCH_GCS_URI environment variable, e.g. gs://my-bucket/compete), and every
+    result is validated and saved exactly like research_competitor_to_json does.
+    Returns a list of file paths for successfully processed competitors.
+    """
+    gcs_uri = gcs_uri or os.getenv("BATCH_GCS_URI")
+    if not gcs_uri or not gcs_uri.startswith("gs://"):
+        print("Error: BATCH_GCS_URI must be set to a gs:// location to use batch inference.")
+        return []
+
+    _ensure_vertex()
+    os.makedirs(output_folder_path, exist_ok=True)
+
+    # Results are matched back to competitors through the competitor-specific prompt
+    # tail echoed in each output line.
+    prompts = {name: _build_research_prompt(name, company_context) for name in competitors_list}
+    tails_to_names = {prompt_parts[-1]: name for name, prompt_parts in prompts.items()}
+    request_settings = {
+        "tools": [_SEARCH_TOOL.to_dict()],
+        "generation_config": _RESEARCH_CONFIG.to_dict()
+    }
+    input_jsonl = "\n".join(
+        json.dumps({"request": {
+            "contents": [{"role": "user", "parts": [{"text": part} for part in prompt_parts]}],
+            **request_settings
+        }})
+        for prompt_parts in prompts.values()
+    )
+
+    bucket_name, prefix = _split_gcs_uri(gcs_uri)
+    run_prefix = "/".join(filter(None, [prefix, "competitor-research", datetime.now().strftime("%Y%m%d-%H%M%S")]))
+    storage_client = storage.Client(project=os.getenv("GOOGLE_CLOUD_PROJECT"))
+    input_blob = storage_client.bucket(bucket_name).blob(f"{run_prefix}/input.jsonl")
+    await asyncio.to_thread(input_blob.upload_from_string, input_jsonl, content_type="application/jsonl")
+
+    job = await asyncio.to_thread(
+        BatchPredictionJob.submit,
+        source_model=GEMINI_MODEL_NAME,
+        input_dataset=f"gs://{bucket_name}/{input_blob.name}",
+        output_uri_prefix=f"gs://{bucket_name}/{run_prefix}/output"
+    )
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] Submitted batch research job for {len(prompts)} competitors: {job.resource_name}")
+
+    while not job.has_ended:
+        await asyncio.sleep(BATCH_POLL_INTERVAL_SECONDS)
+        await asyncio.to_thread(job.refresh)
+    if not job.has_succeeded:
+        print(f"Batch research job failed: {job.error}")
+        return []
+
+    output_bucket, output_prefix = _split_gcs_uri(job.output_location)
+    output_blobs = await asyncio.to_thread(lambda: list(storage_client.list_blobs(output_bucket, prefix=output_prefix)))
+    successful_paths = []
+    for blob in output_blobs:
+        if not blob.name.endswith(".jsonl"):
+            continue
+        content = await asyncio.to_thread(blob.download_as_text)
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            # One bad output line must not stop the rest of the batch from being saved.
+            try:
+                path = await asyncio.to_thread(_save_batch_research_result, json.loads(line), tails_to_names, output_folder_path)
+            except Exception as e:
+                print(f"Warning: Skipping unreadable batch output line: {e!r}")
+                continue
+            if path:
+                successful_paths.append(path)
+
+    print(f"Finished batch research. {len(successful_paths)} successful out of {len(competitors_list)}.")
+    return successful_paths
+
 # --- Notion Database Population ---
 
 # Single source of truth for the Notion database Title property
 TITLE_FIELD_NAME = "Competitor Name"
 
+# Notion API limit is 2000 chars per rich text object.
+NOTION_RICH_TEXT_LIMIT = 2000
+
+# Field groups shared by the property mapper and the database schema.
+DATE_FIELDS = frozenset({"DateAdded", "LastUpdated"})
+NUMBER_FIELDS = frozenset({
+    "CompanySize_Employees", "YearFounded", "Pricing_LowestPaidTier_USD",
+    "Pricing_KeyTier_USD", "Funding_Total_USD", "Total_Reviews_Count",
+    "Average_Rating_Overall",
+})
+
+# Strips currency symbols and thousands separators in a single pass.
+_NUMBER_STRIP_TABLE = str.maketrans("", "", "$,")
+
+def _rich_text(content: str) -> Dict[str, Any]:
+    return {"text": {"content": content}}
+
+def _to_rich_text_chunks(content: str, limit: int = NOTION_RICH_TEXT_LIMIT) -> List[Dict[str, Any]]:
+    """Splits a string into Notion rich_text objects of at most `limit` characters each."""
+    if not content:
+        return [_rich_text("")]
+    return [_rich_text(content[i:i + limit]) for i in range(0, len(content), limit)]
+
+def _pack_lines_into_rich_text(lines: List[str], limit: int = NOTION_RICH_TEXT_LIMIT) -> List[Dict[str, Any]]:
+    """Groups whole lines into rich_text objects of at most `limit` characters each."""
+    payload = []
+    bucket: List[str] = []
+    bucket_len = 0
+    for line in lines:
+        if bucket and bucket_len + len(line) > limit:
+            payload.append(_rich_text("".join(bucket)))
+            bucket, bucket_len = [], 0
+        # A single line longer than the limit gets its own object and is truncated by Notion.
+        bucket.append(line)
+        bucket_len += len(line)
+    if bucket:
+        payload.append(_rich_text("".join(bucket)))
+    return payload
+
+_URL_PREFIXES = ("http://", "https://")
+
+def _is_url(value: Any) -> bool:
+    return isinstance(value, str) and value.startswith(_URL_PREFIXES)
+
+# Missing values map to per-field defaults built once in _field_handler and shared by every
+# record. They are only ever serialized by the Notion client, never mutated.
+_EMPTY_TEXT_PROPERTY = {"rich_text": [{"text": {"content": ""}}]}
+
+def _title_property(value: Any) -> Dict[str, Any]:
+    return {"title": [{"text": {"content": str(value)}}]}
+
+def _url_property(value: Any) -> Dict[str, Any]:
+    return {"url": str(value) if value else None}
+
+def _select_property(value: Any) -> Dict[str, Any]:
+    if isinstance(value, str) and value in _COMPETITOR_TYPES_SET:
+        return {"select": {"name": value}}
+    return {"select": None}
+
+def _sources_property(value: Any) -> Dict[str, Any]:
+    """Formats sources as numbered markdown links, respecting Notion's 2000-character limit per rich text block."""
+    if not (isinstance(value, list) and value):
+        return _EMPTY_TEXT_PROPERTY
+
+    lines = [
+        f"{i}. [{source['description']}]({source['url']})\n"
+        for i, source in enumerate(value, 1)
+        if isinstance(source, dict) and "url" in source and "description" in source
+    ]
+    return {"rich_text": _pack_lines_into_rich_text(lines)}
+
+def _date_property(value: Any) -> Dict[str, Any]:
+    """Normalizes a YYYY-MM-DD date, sending None for anything that is not a real calendar date."""
+    value = str(value)
+    try:
+        parsed = date.fromisoformat(value)
+    except ValueError:
+        # Unpadded dates such as "2024-1-5" are not ISO, but still valid research output.
+        try:
+            parsed = datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError:
+            return {"date": None}
+    return {"date": {"start": parsed.isoformat()}}
+
+def _number_property(value: Any) -> Dict[str, Any]:
+    try:
+        return {"number": float(str(value).translate(_NUMBER_STRIP_TABLE))}
+    except ValueError:
+        return {"number": None}
+
+def _text_property(value: Any) -> Dict[str, Any]:
+    if isinstance(value, list):
+        value = "\n".join(f"• {item}" for item in value)
+    return {"rich_text": _to_rich_text_chunks(str(value))}
+
+def _with_url_detection(handler):
+    """Wraps a handler so string values that are links are stored as url properties instead."""
+    def _handle(value: Any) -> Dict[str, Any]:
+        if _is_url(value):
+            return {"url": value}
+        return handler(value)
+    return _handle
+
+def _field_handler(field: str):
+    """Returns (handler, value used when the field is missing or "N/A") for a CSV_SCHEMA field."""
+    if field == TITLE_FIELD_NAME:
+        return _title_property, {"title": [{"text": {"content": "Untitled Competitor"}}]}
+    if field == "WebsiteURL":
+        return _url_property, {"url": None}
+    if field == "Type":
+        handler, empty_value = _select_property, {"select": None}
+    elif field == "Research_Sources":
+        handler, empty_value = _sources_property, _EMPTY_TEXT_PROPERTY
+    elif field in DATE_FIELDS:
+        handler, empty_value = _date_property, {"date": None}
+    elif field in NUMBER_FIELDS:
+        handler, empty_value = _number_property, {"number": None}
+    elif field == "CompetitorID":
+        handler, empty_value = (lambda value: _text_property(str(value))), _EMPTY_TEXT_PROPERTY
+    else:
+        handler, empty_value = _text_property, _EMPTY_TEXT_PROPERTY
+    return _with_url_detection(handler), empty_value
+
+# Each schema field is specialized to its handler and default once, at import time, so mapping
+# a competitor is a flat run of lookups with no per-field type checks or literal rebuilding.
+_FIELD_HANDLERS = tuple((field, *_field_handler(field)) for field in CSV_SCHEMA)
+
 def map_data_to_notion_properties(competitor_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Maps the competitor data (from JSON) to Notion's property format using global CSV_SCHEMA.
     The Title property name is fixed by TITLE_FIELD_NAME.
     """
     properties = {}
-    for field in CSV_SCHEMA:
+    for field, handler, empty_value in _FIELD_HANDLERS:
         value = competitor_data.get(field)
+        properties[field] = empty_value if value is None or value == "N/A" else handler(value)
+    return properties
 
-        if field == "CompetitorID" and value is not None:
-            value = str(value)
-        
-        if value is None or value == "N/A":
-            if field == TITLE_FIELD_NAME:
-                 properties[field] = {"title": [{"text": {"content": "Untitled Competitor"}}]}
-            elif field == "WebsiteURL":
-                properties[field] = {"url": None}
-            elif field == "Type":
-                properties[field] = {"select": None}
-            elif field in ["DateAdded", "LastUpdated"]:
-                properties[field] = {"date": None}
-            elif field in ["CompanySize_Employees", "YearFounded", "Pricing_LowestPaidTier_USD", 
-                          "Pricing_KeyTier_USD", "Funding_Total_USD", "Total_Reviews_Count",
-                          "Average_Rating_Overall"]:
-                properties[field] = {"number": None}
-            else:
-                properties[field] = {"rich_text": [{"text": {"content": ""}}]}
-            continue
+# Records {database_id:path: [sha256, page_id]} for files already uploaded, so re-runs
+# only send competitors whose JSON actually changed.
+NOTION_UPLOAD_CACHE_PATH = os.path.join(repo_root, ".cache", "notion_uploaded.json")
 
-        if field == TITLE_FIELD_NAME:
-            properties[field] = {"title": [{"text": {"content": str(value)}}]}
-        elif field == "WebsiteURL" or (isinstance(value, str) and (value.startswith("http://") or value.startswith("https://"))):
-            properties[field] = {"url": str(value) if value else None}
-        elif field == "Type":
-            if value in COMPETITOR_TYPES:
-                properties[field] = {"select": {"name": value}}
-            else:
-                properties[field] = {"select": None}
-        
-        # --- START of Change ---
-        # Updated logic to handle Notion's 2000-character limit per rich text block.
-        elif field == "Research_Sources":
-            if isinstance(value, list) and value:
-                rich_text_payload = []
-                current_chunk = ""
-                for i, source in enumerate(value, 1):
-                    if isinstance(source, dict) and "url" in source and "description" in source:
-                        # Format the source line with a newline character
-                        source_line = f"{i}. [{source['description']}]({source['url']})\n"
-                        
-                        # Notion API limit is 2000 chars per rich text object.
-                        # Check if adding the new line exceeds the limit.
-                        if len(current_chunk) + len(source_line) > 2000:
-                            # If the chunk is full, add it to the payload if it's not empty.
-                            if current_chunk:
-                                rich_text_payload.append({"text": {"content": current_chunk}})
-                            # Start a new chunk. If the line itself is too long, it will be truncated by Notion.
-                            current_chunk = source_line
-                        else:
-                            # Otherwise, add the line to the current chunk.
-                            current_chunk += source_line
-                
-                # Add the last remaining chunk to the payload.
-                if current_chunk:
-                    rich_text_payload.append({"text": {"content": current_chunk}})
-                
-                properties[field] = {"rich_text": rich_text_payload}
-            else:
-                # Handle cases with no sources or invalid format.
-                properties[field] = {"rich_text": [{"text": {"content": ""}}]}
-        # --- END of Change ---
-        
-        elif field in ["DateAdded", "LastUpdated"]:
-            try:
-                # Try to parse the date string
-                from datetime import datetime
-                date_obj = datetime.strptime(str(value), "%Y-%m-%d")
-                properties[field] = {"date": {"start": date_obj.strftime("%Y-%m-%d")}}
-            except:
-                properties[field] = {"date": None}
-        elif field in ["CompanySize_Employees", "YearFounded", "Pricing_LowestPaidTier_USD", 
-                      "Pricing_KeyTier_USD", "Funding_Total_USD", "Total_Reviews_Count",
-                      "Average_Rating_Overall"]:
-            try:
-                # Try to convert to number
-                num_value = float(str(value).replace("$", "").replace(",", ""))
-                properties[field] = {"number": num_value}
-            except:
-                properties[field] = {"number": None}
-        elif isinstance(value, list):
-            # Also apply chunking for other potentially long list fields
-            content_string = "\n".join([f"• {str(item)}" for item in value])
-            rich_text_payload = []
-            
-            # Split the string into chunks of 2000 characters
-            for i in range(0, len(content_string), 2000):
-                chunk = content_string[i:i+2000]
-                rich_text_payload.append({"text": {"content": chunk}})
-                
-            if not rich_text_payload:
-                properties[field] = {"rich_text": [{"text": {"content": ""}}]}
-            else:
-                 properties[field] = {"rich_text": rich_text_payload}
-        else:
-            # Also apply chunking for any other potentially long text field
-            content_string = str(value)
-            rich_text_payload = []
-            
-            # Split the string into chunks of 2000 characters
-            for i in range(0, len(content_string), 2000):
-                chunk = content_string[i:i+2000]
-                rich_text_payload.append({"text": {"content": chunk}})
+def _list_json_files(folder: str) -> List[str]:
+    """Paths of the .json files directly inside `folder` (scandir avoids a stat per entry)."""
+    with os.scandir(folder) as entries:
+        return [entry.path for entry in entries if entry.name.endswith('.json') and entry.is_file()]
+
+def _read_file_bytes(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
 
-            if not rich_text_payload:
-                properties[field] = {"rich_text": [{"text": {"content": ""}}]}
+def _load_upload_cache() -> Dict[str, List[str]]:
+    try:
+        with open(NOTION_UPLOAD_CACHE_PATH, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _save_upload_cache(cache: Dict[str, List[str]]) -> None:
+    os.makedirs(os.path.dirname(NOTION_UPLOAD_CACHE_PATH), exist_ok=True)
+    tmp_path = f"{NOTION_UPLOAD_CACHE_PATH}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp_path, NOTION_UPLOAD_CACHE_PATH)
+
+async def _notion_call(rate_controller: _RateController, api_method, **kwargs) -> Any:
+    """
+    Calls a Notion API method inside a rate controller slot.
+    Rate-limited calls shrink the controller's limit and are retried after Retry-After.
+    """
+    for attempt in range(NOTION_MAX_RETRIES + 1):
+        async with rate_controller.slot():
+            try:
+                result = await api_method(**kwargs)
+            except APIResponseError as e:
+                if e.code != "rate_limited" or attempt == NOTION_MAX_RETRIES:
+                    raise
+                rate_controller.on_rate_limit()
+                delay = _compute_backoff(e, attempt + 1)
             else:
-                 properties[field] = {"rich_text": rich_text_payload}
+                rate_controller.on_success()
+                return result
+        print(f"Notion rate limit hit, retrying in {delay:.1f}s (concurrency now {rate_controller.limit}).")
+        await asyncio.sleep(delay)
 
-    return properties
+async def _load_existing_titles(
+    notion_async_client: AsyncClient,
+    database_id: str,
+    rate_controller: _RateController
+) -> Dict[str, str]:
+    """
+    Pages through the whole database once and returns a {title: page_id} map.
+    Queries go through `rate_controller`, like the uploads that follow.
+    """
+    existing_pages = {}
+    cursor = None
+    while True:
+        query_args = {"database_id": database_id, "page_size": 100}
+        if cursor:
+            query_args["start_cursor"] = cursor
+        response = await _notion_call(rate_controller, notion_async_client.databases.query, **query_args)
+        for page in response.get("results", []):
+            title_parts = page.get("properties", {}).get(TITLE_FIELD_NAME, {}).get("title", [])
+            title = "".join(part.get("plain_text", "") for part in title_parts)
+            if title:
+                existing_pages.setdefault(title, page["id"])
+        if not response.get("has_more"):
+            return existing_pages
+        cursor = response.get("next_cursor")
 
 async def add_json_to_notion_db(
     notion_async_client: AsyncClient,
     database_id: str,
-    competitor_json_path: str
+    competitor_json_path: str,
+    existing_pages: Dict[str, str] | None = None,
+    rate_controller: _RateController | None = None,
+    upload_cache: Dict[str, List[str]] | None = None
 ) -> bool:
     """
     Reads a competitor's JSON data and adds/updates it as a page in the Notion database.
+    If `existing_pages` ({title: page_id}) is given, it is used instead of querying Notion per file.
+    Notion calls go through `rate_controller`, shared across a batch to adapt to rate limits.
+    If `upload_cache` is given, files unchanged since their last upload are skipped and
+    successful uploads are recorded in it.
     """
+    if rate_controller is None:
+        rate_controller = _RateController(NOTION_MAX_CONCURRENCY, maximum=NOTION_MAX_CONCURRENCY)
+
     try:
-        with open(competitor_json_path, 'r') as f:
-            competitor_data = json.load(f)
+        raw_content = await asyncio.to_thread(_read_file_bytes, competitor_json_path)
+        competitor_data = json.loads(raw_content)
     except Exception as e:
         print(f"Error reading/parsing JSON file {competitor_json_path}: {e}")
         return False
 
     competitor_name_for_log = competitor_data.get(TITLE_FIELD_NAME, os.path.basename(competitor_json_path).replace('.json',''))
+
+    cache_key = f"{database_id}:{os.path.abspath(competitor_json_path)}"
+    content_hash = hashlib.sha256(raw_content).hexdigest()
+    if upload_cache is not None:
+        cached_hash, cached_page_id = upload_cache.get(cache_key, (None, None))
+        # Only trust the cache while the page is still in the database (when we know its contents).
+        page_still_exists = existing_pages is None or cached_page_id in existing_pages.values()
+        if cached_hash == content_hash and page_still_exists:
+            print(f"Competitor '{competitor_name_for_log}' is unchanged since its last upload. Skipping.")
+            return True
     
     try:
         notion_properties = map_data_to_notion_properties(competitor_data)
@@ -402,9 +1022,11 @@ async def add_json_to_notion_db(
              api_query_filter = {"property": TITLE_FIELD_NAME, "title": {"equals": competitor_data.get(TITLE_FIELD_NAME)}}
         
         existing_page_id = None
-        if api_query_filter:
+        if existing_pages is not None:
+            existing_page_id = existing_pages.get(competitor_data.get(TITLE_FIELD_NAME))
+        elif api_query_filter:
             try:
-                existing_pages_response = await notion_async_client.databases.query(database_id=database_id, filter=api_query_filter)
+                existing_pages_response = await _notion_call(rate_controller, notion_async_client.databases.query, database_id=database_id, filter=api_query_filter)
                 if existing_pages_response and existing_pages_response.get("results"):
                     existing_page_id = existing_pages_response["results"][0]["id"]
             except Exception as query_e:
@@ -412,12 +1034,15 @@ async def add_json_to_notion_db(
 
         if existing_page_id:
             print(f"Competitor '{competitor_name_for_log}' already exists (ID: {existing_page_id}). Updating.")
-            await notion_async_client.pages.update(page_id=existing_page_id, properties=notion_properties)
+            await _notion_call(rate_controller, notion_async_client.pages.update, page_id=existing_page_id, properties=notion_properties)
             print(f"Successfully updated '{competitor_name_for_log}' in Notion.")
         else:
             print(f"Adding new competitor '{competitor_name_for_log}' to Notion database {database_id}.")
-            await notion_async_client.pages.create(parent={"database_id": database_id}, properties=notion_properties)
+            created_page = await _notion_call(rate_controller, notion_async_client.pages.create, parent={"database_id": database_id}, properties=notion_properties)
+            existing_page_id = created_page.get("id")
             print(f"Successfully added '{competitor_name_for_log}' to Notion.")
+        if upload_cache is not None:
+            upload_cache[cache_key] = [content_hash, existing_page_id]
         return True
     except Exception as e:
         error_message = str(e)
@@ -433,23 +1058,23 @@ async def add_json_to_notion_db(
 async def populate_notion_db_from_folder(
     output_folder: str,
     database_id: str,
-    notion_token: str
+    notion_token: str,
+    notion_client: AsyncClient | None = None
 ) -> None:
     """
     Populates Notion database from all JSON files in the output_folder.
+    Pass an open `notion_client` to reuse its connections; otherwise one is created
+    from `notion_token` and closed when the uploads are done.
     """
-    if not notion_token:
+    if not notion_token and notion_client is None:
         print("Notion API token is not provided. Cannot populate database.")
         return
     if not database_id:
         print("Notion Database ID is not provided. Cannot populate database.")
         return
 
-    notion_client = AsyncClient(auth=notion_token)
-    tasks = []
-    
     try:
-        json_files = [f for f in os.listdir(output_folder) if f.endswith('.json')]
+        json_files = await asyncio.to_thread(_list_json_files, output_folder)
     except FileNotFoundError:
         print(f"Error: Output folder {output_folder} not found.")
         return
@@ -458,16 +1083,39 @@ async def populate_notion_db_from_folder(
         print(f"No JSON files found in {output_folder}.")
         return
 
-    for json_file_name in json_files:
-        json_file_path = os.path.join(output_folder, json_file_name)
-        tasks.append(add_json_to_notion_db(notion_client, database_id, json_file_path))
-    
-    results = await asyncio.gather(*tasks, return_exceptions=True) 
+    # A single client for the whole batch keeps the underlying HTTP connections alive
+    # across requests; a client we create here is closed once all uploads are done.
+    client_context = contextlib.nullcontext(notion_client) if notion_client else AsyncClient(auth=notion_token)
+    async with client_context as notion_client:
+        # Shared by the title scan and all uploads: starts at Notion's documented rate, which
+        # is also its ceiling, and backs off on 429s.
+        rate_controller = _RateController(NOTION_MAX_CONCURRENCY, maximum=NOTION_MAX_CONCURRENCY)
+
+        # One paged scan of the database replaces a title query per file.
+        try:
+            existing_pages = await _load_existing_titles(notion_client, database_id, rate_controller)
+        except Exception as e:
+            print(f"Warning: Could not list existing pages in Notion database: {e}. Falling back to per-file lookups.")
+            existing_pages = None
+
+        upload_cache = _load_upload_cache()
+        tasks = []
+        for json_file_path in json_files:
+            tasks.append(add_json_to_notion_db(
+                notion_client, database_id, json_file_path, existing_pages, rate_controller, upload_cache
+            ))
+        
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    try:
+        await asyncio.to_thread(_save_upload_cache, upload_cache)
+    except OSError as e:
+        print(f"Warning: Could not save Notion upload cache: {e}")
     
     successful_uploads = 0
     for i, res_or_exc in enumerate(results):
         if isinstance(res_or_exc, Exception):
-            print(f"Error processing file {json_files[i]}: {res_or_exc}")
+            print(f"Error processing file {os.path.basename(json_files[i])}: {res_or_exc}")
         elif res_or_exc is True:
             successful_uploads += 1
             
@@ -475,8 +1123,58 @@ async def populate_notion_db_from_folder(
 
 # --- Notion Database Creation ---
 
+# Notion object IDs are 32 hex characters once hyphens are removed.
+_NOTION_ID_RE = re.compile(r"[0-9a-fA-F]{32}")
+
+def _notion_db_property(field_name: str) -> Dict[str, Any]:
+    """Notion database property definition for a CSV_SCHEMA field."""
+    if field_name == TITLE_FIELD_NAME:
+        return {"title": {}}
+    if field_name == "WebsiteURL":
+        return {"url": {}}
+    if field_name == "Type":
+        return {"select": {"options": [{"name": t} for t in COMPETITOR_TYPES]}}
+    if field_name in DATE_FIELDS:
+        return {"date": {}}
+    if field_name in NUMBER_FIELDS:
+        return {"number": {}}
+    # Research_Sources is also stored as formatted text with clickable links
+    return {"rich_text": {}}
+
+# The database schema only depends on config.json, so it is built once per process.
+NOTION_DB_PROPERTIES = {field_name: _notion_db_property(field_name) for field_name in CSV_SCHEMA}
+
+async def _sync_notion_db_schema(notion_async_client: AsyncClient, database_id: str) -> bool:
+    """
+    Compares an existing database's properties with NOTION_DB_PROPERTIES (one GET) and adds any
+    missing ones. No update is sent when the schema already matches.
+    Returns False if the database could not be retrieved.
+    """
+    try:
+        database = await notion_async_client.databases.retrieve(database_id=database_id)
+    except Exception as e:
+        print(f"Warning: Could not retrieve Notion database {database_id}: {e}")
+        return False
+
+    current_types = {name: prop.get("type") for name, prop in database.get("properties", {}).items()}
+    missing = {name: prop for name, prop in NOTION_DB_PROPERTIES.items() if name not in current_types}
+    for name, prop in NOTION_DB_PROPERTIES.items():
+        expected_type = next(iter(prop))
+        if name in current_types and current_types[name] != expected_type:
+            print(f"Warning: Notion property '{name}' is '{current_types[name]}' but the schema expects '{expected_type}'.")
+
+    if not missing:
+        print("Notion database schema is up to date.")
+        return True
+    try:
+        await notion_async_client.databases.update(database_id=database_id, properties=missing)
+        print(f"Added {len(missing)} missing properties to the Notion database: {', '.join(missing)}")
+    except Exception as e:
+        print(f"Warning: Could not add missing properties to the Notion database: {e}")
+    return True
+
 async def create_notion_db_from_schema(
-    notion_sync_client: Client, 
+    notion_async_client: AsyncClient,
     parent_page_id: str,
     db_title: str
 ) -> str | None:
@@ -484,8 +1182,6 @@ async def create_notion_db_from_schema(
     Creates a new Notion database under parent_page_id using global CSV_SCHEMA.
     Returns the new database ID or None on failure.
     """
-    properties: Dict[str, Any] = {}
-
     if TITLE_FIELD_NAME not in CSV_SCHEMA:
         print(f"Error: Title property '{TITLE_FIELD_NAME}' not in CSV_SCHEMA.")
         return None
@@ -494,41 +1190,17 @@ async def create_notion_db_from_schema(
         return None
     
     # Validate parent_page_id format (basic check for 32 hex chars or 36 with hyphens)
-    normalized_parent_page_id = parent_page_id.replace("-", "")
-    if not (len(normalized_parent_page_id) == 32 and all(c in '0123456789abcdefABCDEF' for c in normalized_parent_page_id)):
+    if not _NOTION_ID_RE.fullmatch(parent_page_id.replace("-", "")):
         print(f"Error: Invalid NOTION_PARENT_PAGE_ID format: '{parent_page_id}'. It should be a 32-character hex string (hyphens optional).")
         return None
 
     try:
         print(f"Creating Notion database '{db_title}' under page ID {parent_page_id}...")
         
-        # First create the database with all properties
-        for field_name in CSV_SCHEMA:
-            if field_name == TITLE_FIELD_NAME:
-                properties[field_name] = {"title": {}}
-            elif field_name == "WebsiteURL":
-                properties[field_name] = {"url": {}}
-            elif field_name == "Type":
-                properties[field_name] = {
-                    "select": {
-                        "options": [{"name": t} for t in COMPETITOR_TYPES]
-                    }
-                }
-            elif field_name == "Research_Sources":
-                properties[field_name] = {"rich_text": {}}  # Will store as formatted text with clickable links
-            elif field_name in ["DateAdded", "LastUpdated"]:
-                properties[field_name] = {"date": {}}
-            elif field_name in ["CompanySize_Employees", "YearFounded", "Pricing_LowestPaidTier_USD", 
-                              "Pricing_KeyTier_USD", "Funding_Total_USD", "Total_Reviews_Count",
-                              "Average_Rating_Overall"]:
-                properties[field_name] = {"number": {}}
-            else:
-                properties[field_name] = {"rich_text": {}}
-        
-        response = notion_sync_client.databases.create(
+        response = await notion_async_client.databases.create(
             parent={"type": "page_id", "page_id": parent_page_id},
             title=[{"type": "text", "text": {"content": db_title}}],
-            properties=properties,
+            properties=NOTION_DB_PROPERTIES,
             is_inline=False 
         )
         
@@ -536,9 +1208,9 @@ async def create_notion_db_from_schema(
         if db_id:
             # Now update the database to set property order
             try:
-                notion_sync_client.databases.update(
+                await notion_async_client.databases.update(
                     database_id=db_id,
-                    properties=properties,
+                    properties=NOTION_DB_PROPERTIES,
                     property_items=[{"name": field_name} for field_name in CSV_SCHEMA]
                 )
                 print(f"Successfully set property order for database {db_id}")
@@ -567,11 +1239,13 @@ async def setup_notion_database(
     notion_token: str,
     parent_page_id: str,
     database_name: str,
-    database_id: str | None = None
+    database_id: str | None = None,
+    sync_schema: bool = False
 ) -> str | None:
     """
     Sets up a Notion database for competitor research.
-    If database_id is provided, verifies it exists.
+    If database_id is provided, it is used as is (with sync_schema, any schema properties
+    it lacks are added first).
     If not, creates a new database under the specified parent page.
     
     Args:
@@ -579,6 +1253,7 @@ async def setup_notion_database(
         parent_page_id: ID of the parent page where to create the database
         database_name: Name for the new database
         database_id: Optional existing database ID
+        sync_schema: Add missing CSV_SCHEMA properties to the existing database
         
     Returns:
         str: Database ID if successful
@@ -586,6 +1261,10 @@ async def setup_notion_database(
     """
     if database_id:
         print(f"Using existing Notion Database ID: {database_id}")
+        if sync_schema and notion_token:
+            async with AsyncClient(auth=notion_token) as notion_client:
+                if not await _sync_notion_db_schema(notion_client, database_id):
+                    print("Warning: Skipped the schema sync; the database ID is used unchanged.")
         return database_id
     
     if not notion_token:
@@ -598,13 +1277,12 @@ async def setup_notion_database(
     print(f"Attempting to create Notion Database titled '{database_name}' under parent page ID: {parent_page_id}")
     
     try:
-        sync_notion_client = Client(auth=notion_token)
-        
-        new_db_id = await create_notion_db_from_schema(
-            notion_sync_client=sync_notion_client,
-            parent_page_id=parent_page_id,
-            db_title=database_name
-        )
+        async with AsyncClient(auth=notion_token) as notion_client:
+            new_db_id = await create_notion_db_from_schema(
+                notion_async_client=notion_client,
+                parent_page_id=parent_page_id,
+                db_title=database_name
+            )
         
         if new_db_id:
             print(f"Successfully created Notion Database. New ID: {new_db_id}")
@@ -623,118 +1301,336 @@ async def setup_notion_database(
 
 # --- Competitor Research Update ---
 
-async def update_single_competitor_async(
-    json_file_path: str,
-    company_context: str
-) -> Tuple[str, str] | None:
+# Blocking file helpers, run via asyncio.to_thread so disk I/O doesn't stall the event loop.
+def _read_json_file(path: str) -> Any:
+    with open(path, 'r') as f:
+        return json.load(f)
+
+# Run-scoped parses of competitor files: path -> ((mtime_ns, size), data).
+_ReadCache = Dict[str, Tuple[Tuple[int, int], Any]]
+
+def _snapshot_competitor_json(path: str) -> Tuple[Tuple[int, int], Any]:
+    # Stat before reading, so a write in between makes the key stale rather than the data.
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size), _read_json_file(path)
+
+def _read_competitor_json(path: str, read_cache: _ReadCache | None = None) -> Any:
     """
-    Reads existing competitor data, performs a new full research,
-    and uses an LLM to generate an updated JSON and a summary of changes.
+    Reads a competitor file. `read_cache` holds parses made earlier in the same run (e.g. by
+    the delta check); while the file is unchanged (same mtime and size) its entry is handed
+    over and removed, so each parse is reused at most once and released with its caller.
+    """
+    if read_cache is not None and (cached := read_cache.pop(path, None)) is not None:
+        stat = os.stat(path)
+        if cached[0] == (stat.st_mtime_ns, stat.st_size):
+            return cached[1]
+    return _read_json_file(path)
+
+def _write_text_file(path: str, text: str) -> None:
+    with open(path, 'w') as f:
+        f.write(text)
+
+def _write_json_file(path: str, data: Any) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Serializing to one string and writing it once is cheaper than json.dump's
+    # chunk-by-chunk writes, and never leaves a half-serialized file on an encoding error.
+    content = json.dumps(data, indent=2)
+    with open(path, 'w') as f:
+        f.write(content)
+
+# Appended to the prompt when the previous answer could not be parsed.
+_JSON_CORRECTION_SUFFIX = """
+    **Correction:** Your previous answer could not be parsed. Reply with ONLY the JSON object described above, with both keys present and no surrounding text.
     """
-    try:
-        with open(json_file_path, 'r') as f:
-            old_data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        print(f"Error reading or parsing existing JSON {json_file_path}: {e}")
-        return None
 
-    competitor_name = old_data.get("Competitor Name", "Unknown Competitor")
-    print(f"Performing full re-research for '{competitor_name}'...")
+# Change summaries of today's successful updates, keyed by the data they produced, so
+# re-running the update on the same day skips competitors that were already refreshed.
+UPDATE_CACHE_DIR = os.path.join(repo_root, ".cache", "competitor_updates")
+
+# Discovery results of today's runs, keyed by the exact prompt sent to the model.
+DISCOVERY_CACHE_DIR = os.path.join(repo_root, ".cache", "competitor_discovery")
+
+def _daily_cache_path(cache_dir: str, payload: str) -> str:
+    """
+    Cache file for `payload` that is only valid for today. The model name is part of the
+    key, so switching models never serves answers produced by the previous one.
+    """
+    key = hashlib.blake2b(f"{GEMINI_MODEL_NAME}\0{payload}".encode(), digest_size=16).hexdigest()
+    return os.path.join(cache_dir, f"{key}-{datetime.now().strftime('%Y%m%d')}.json")
 
-    # Simplified prompt for a full re-research and comparison.
-    prompt = f"""**Role:** You are a Senior Market Research Analyst for a company with this context: `{company_context}`.
+def _update_cache_path(competitor_data: Dict[str, Any], company_context: str) -> str:
+    return _daily_cache_path(UPDATE_CACHE_DIR, json.dumps(competitor_data, sort_keys=True) + company_context)
+
+# Simplified prompt for a full re-research and comparison.
+_UPDATE_PROMPT_TEMPLATE = string.Template("""**Role:** You are a Senior Market Research Analyst for a company with this context: `${company_context}`.
 
     **Objective:**
-    Perform a fresh, deep-dive research on '{competitor_name}'. Then, compare your new findings against the `PREVIOUS_RESEARCH_DATA` provided below to identify any changes.
+    Perform a fresh, deep-dive research on '${competitor_name}'. Then, compare your new findings against the `PREVIOUS_RESEARCH_DATA` provided below to identify any changes.
 
     **Methodology:**
-    1.  **Full Research:** Use the Google Search tool to find all current information about '{competitor_name}'.
+    1.  **Full Research:** Use the Google Search tool to find all current information about '${competitor_name}'.
     2.  **Compare and Synthesize:** Compare your new findings with the `PREVIOUS_RESEARCH_DATA`.
     3.  **Generate Two Outputs:** Produce a single JSON object with two keys: `updated_competitor_data` and `change_summary`.
 
     **PREVIOUS_RESEARCH_DATA:**
     ```json
-    {json.dumps(old_data, indent=2)}
+    ${old_data_json}
     ```
 
     **Output Instructions:**
     Your entire response MUST be a single, valid JSON object with the structure:
-    {{
-        "updated_competitor_data": {{
+    {
+        "updated_competitor_data": {
             // A COMPLETE and UPDATED JSON object for the competitor based on your new research.
             // It MUST contain ALL keys from the original schema.
-        }},
+        },
         "change_summary": "A concise, one-paragraph summary of the most significant changes found when comparing your new research to the old data. If no significant changes were found, state that."
-    }}
+    }
+    """)
+
+def _build_update_prompt(competitor_name: str, company_context: str, old_data_json: str) -> str:
+    """Builds the re-research prompt from the previous research, serialized once by the caller."""
+    return _UPDATE_PROMPT_TEMPLATE.substitute(
+        competitor_name=competitor_name,
+        company_context=company_context,
+        old_data_json=old_data_json
+    )
+
+async def update_single_competitor_async(
+    json_file_path: str,
+    company_context: str,
+    force: bool = False,
+    read_cache: _ReadCache | None = None
+) -> Tuple[str, str] | None:
+    """
+    Reads existing competitor data, performs a new full research,
+    and uses an LLM to generate an updated JSON and a summary of changes.
+    If this exact data was already produced by an update today, the cached change
+    summary is returned without calling the LLM, unless force is True.
     """
+    try:
+        old_data = await asyncio.to_thread(_read_competitor_json, json_file_path, read_cache)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"Error reading or parsing existing JSON {json_file_path}: {e}")
+        return None
 
-    # Create a simple, generic search tool configuration inside the function.
-    search_tool = Tool.from_dict({"google_search": {}})
+    competitor_name = old_data.get("Competitor Name", "Unknown Competitor")
+
+    if not force:
+        try:
+            cached = await asyncio.to_thread(_read_json_file, _update_cache_path(old_data, company_context))
+            print(f"Using today's cached update for '{competitor_name}'.")
+            return (json_file_path, f"**{competitor_name}:** {cached['change_summary']}")
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+
+    print(f"Performing full re-research for '{competitor_name}'...")
+
+    # Serialize the previous research once; the prompt is built from this string.
+    # Compact separators (and raw non-ASCII) keep the prompt's token count down.
+    old_data_json = json.dumps(old_data, ensure_ascii=False, separators=(",", ":"))
+    prompt = _build_update_prompt(competitor_name, company_context, old_data_json)
+    # Only the serialized form is needed from here on; drop the parsed dict so it is not
+    # held by every concurrent retry loop.
+    del old_data
 
     request_args = {
-        "generation_config": GenerationConfig(temperature=0.2, top_p=1.0),
-        "tools": [search_tool]
+        "generation_config": _UPDATE_CONFIG,
+        "tools": [_SEARCH_TOOL],
+        "stream": True
     }
 
-    model = generative_models.GenerativeModel("gemini-2.5-flash")
+    model = _get_model()
+    # API failures and unparseable responses are budgeted separately so a malformed
+    # answer doesn't consume the retries reserved for transient API errors.
     max_retries = 2
-    for attempt in range(max_retries):
+    max_parse_retries = 2
+    api_failures = 0
+    parse_failures = 0
+    current_prompt = prompt
+    while True:
         try:
-            response = await model.generate_content_async([prompt], **request_args)
-            response_text = "".join(part.text for part in response.candidates[0].content.parts).strip()
-
-            if response_text.startswith("```json"):
-                response_text = response_text[7:-3].strip()
-
-            parsed_response = json.loads(response_text)
+            # Streamed so a truncated or blocked answer is abandoned as soon as it is reported.
+            async with _llm_slot():
+                stream = await model.generate_content_async(current_prompt, **request_args)
+                response_text = await _collect_streamed_text(stream)
+            parsed_response = _require_json_object(_loads_llm_json(response_text))
             updated_data = parsed_response.get("updated_competitor_data")
             change_summary = parsed_response.get("change_summary")
 
             if not updated_data or not change_summary:
                 raise ValueError("LLM response missing 'updated_competitor_data' or 'change_summary'.")
+            if not isinstance(updated_data, dict):
+                raise ValueError("LLM response 'updated_competitor_data' is not a JSON object.")
 
             updated_data["LastUpdated"] = datetime.now().strftime("%Y-%m-%d")
-            with open(json_file_path, 'w') as f:
-                json.dump(updated_data, f, indent=2)
+            await asyncio.to_thread(_write_json_file, json_file_path, updated_data)
+            try:
+                await asyncio.to_thread(
+                    _write_json_file,
+                    _update_cache_path(updated_data, company_context),
+                    {"change_summary": change_summary}
+                )
+            except OSError as cache_err:
+                print(f"Warning: Could not cache update for '{competitor_name}': {cache_err}")
 
             print(f"Successfully updated research for '{competitor_name}'.")
             return (json_file_path, f"**{competitor_name}:** {change_summary}")
 
-        except (json.JSONDecodeError, ValueError, Exception) as e:
-            print(f"Attempt {attempt + 1} failed for '{competitor_name}': {e}")
-            if attempt == max_retries - 1:
+        # Only parse and API errors are retried; anything else is a bug and propagates.
+        except (json.JSONDecodeError, ValueError, GoogleAPIError, TimeoutError) as e:
+            if isinstance(e, ValueError):  # includes json.JSONDecodeError
+                parse_failures += 1
+                print(f"Invalid response for '{competitor_name}' (parse attempt {parse_failures}): {e}")
+                exhausted = parse_failures > max_parse_retries
+                current_prompt = prompt + _JSON_CORRECTION_SUFFIX
+            else:
+                api_failures += 1
+                print(f"Attempt {api_failures} failed for '{competitor_name}': {e}")
+                exhausted = api_failures > max_retries
+            if exhausted:
                 print(f"Skipping update for '{competitor_name}' after multiple failures.")
                 return None
-            await asyncio.sleep(5)
-    return None
+            await asyncio.sleep(_compute_backoff(e, api_failures))
 
 
-async def generate_top_changes_summary_async(
-    all_changes: List[str],
+# With DELTA_CHECK_BATCH_SIZE > 1, updates first ask Gemini in one call per batch of that many
+# competitors whether anything material changed, and only fully re-research those that did.
+DELTA_CHECK_BATCH_SIZE = int(os.getenv("DELTA_CHECK_BATCH_SIZE") or 0)
+
+_DELTA_CHECK_PROMPT_TEMPLATE = string.Template("""**Role:** You are a Senior Market Research Analyst for a company with this context: `${company_context}`.
+
+    **Objective:**
+    Below are the previous research records of ${competitor_count} competitors. For EACH of them, use the Google Search tool to check whether anything material has changed since its `LastUpdated` date: funding, pricing, product or AI feature launches, acquisitions, leadership, market focus or shutdown.
+
+    **PREVIOUS_RESEARCH_DATA (JSON array):**
+    ```json
+    ${records_json}
+    ```
+
+    **Output Instructions:**
+    Your entire response MUST be a single, valid JSON object with exactly one entry per competitor:
+    {
+        "results": [
+            {"name": "<Competitor Name exactly as given>", "has_changes": true, "change_summary": "One sentence on what changed, or an empty string."}
+        ]
+    }
+    """)
+
+async def _delta_check_batch_async(
+    records: List[Tuple[str, Dict[str, Any]]],
     company_context: str
-) -> str:
+) -> List[str]:
     """
-    Takes a list of individual competitor change summaries and synthesizes them
-    into a top-10 executive briefing for the company's founders.
+    Checks a batch of (json_file_path, competitor_data) records for changes in a single LLM call.
+    Returns the paths that need a full re-research. Competitors the model leaves out, and the
+    whole batch if the call fails, are treated as changed so no update is silently dropped.
     """
-    if not all_changes:
-        return "No significant competitor updates found in this run."
+    all_paths = [path for path, _ in records]
+    prompt = _DELTA_CHECK_PROMPT_TEMPLATE.substitute(
+        company_context=company_context,
+        competitor_count=len(records),
+        records_json=json.dumps([data for _, data in records], ensure_ascii=False, separators=(",", ":"))
+    )
+    request_args = {
+        "generation_config": _UPDATE_CONFIG,
+        "tools": [_SEARCH_TOOL]
+    }
+    try:
+        async with _llm_slot():
+            response = await _get_model().generate_content_async(prompt, **request_args)
+        results = _parse_json_response(response).get("results", [])
+        changed = {r.get("name"): r for r in results if isinstance(r, dict)}
+    except Exception as e:
+        print(f"Delta check failed for a batch of {len(records)} competitors, re-researching all of them: {e}")
+        return all_paths
+
+    to_update = []
+    for path, data in records:
+        name = data.get("Competitor Name", "Unknown Competitor")
+        result = changed.get(name)
+        if result is None or result.get("has_changes") is not False:
+            to_update.append(path)
+        else:
+            print(f"No material changes found for '{name}'. Skipping re-research.")
+    return to_update
 
-    # Create a simple request_args without a search tool, as it's not needed.
-    request_args = {"generation_config": GenerationConfig(temperature=0.2, top_p=1.0)}
+async def _select_competitors_to_update(
+    json_file_paths: List[str],
+    company_context: str,
+    read_cache: _ReadCache
+) -> List[str]:
+    """
+    Runs the batched delta check over all competitors and returns the paths worth re-researching.
+    The parsed files of those competitors are left in `read_cache` for their updates.
+    """
+    records = []
+    to_update = []
+    for path in json_file_paths:
+        try:
+            snapshot = await asyncio.to_thread(_snapshot_competitor_json, path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            # Let update_single_competitor_async report unreadable files as usual.
+            to_update.append(path)
+            continue
+        read_cache[path] = snapshot
+        records.append((path, snapshot[1]))
+
+    batches = [records[i:i + DELTA_CHECK_BATCH_SIZE] for i in range(0, len(records), DELTA_CHECK_BATCH_SIZE)]
+    for batch_paths in await asyncio.gather(*(_delta_check_batch_async(batch, company_context) for batch in batches)):
+        to_update.extend(batch_paths)
+    print(f"Delta check: {len(to_update)} of {len(json_file_paths)} competitors need a full re-research.")
+    # Skipped competitors won't be read again this run.
+    for path in read_cache.keys() - set(to_update):
+        del read_cache[path]
+    return to_update
+
+async def update_all_competitors_async(
+    json_file_paths: List[str],
+    company_context: str,
+    force: bool = False,
+    concurrency: int = LLM_MAX_CONCURRENCY
+) -> List[Tuple[str, str]]:
+    """
+    Re-researches all given competitors concurrently, at most `concurrency` at a time, so
+    only that many files and prompts are held in memory while waiting for Gemini.
+    In-flight Gemini calls across the process stay bounded by the shared LLM semaphore.
+    If DELTA_CHECK_BATCH_SIZE is above 1 (and force is not set), unchanged competitors are
+    filtered out first with batched delta checks.
+    Returns the (json_file_path, change_summary) pairs of the successful updates.
+    """
+    # Files parsed by the delta check are reused once by their update, then dropped.
+    read_cache: _ReadCache = {}
+    if DELTA_CHECK_BATCH_SIZE > 1 and not force:
+        json_file_paths = await _select_competitors_to_update(json_file_paths, company_context, read_cache)
+
+    results = await semaphore_gather(*(
+        update_single_competitor_async(
+            json_file_path=path, company_context=company_context, force=force, read_cache=read_cache
+        )
+        for path in json_file_paths
+    ), limit=concurrency, return_exceptions=True)
 
-    combined_changes_text = "\n\n".join(all_changes)
-    prompt = f"""**Role:** You are a Chief Strategy Officer reporting directly to your company's founders.
+    successful_updates = []
+    for path, res_or_exc in zip(json_file_paths, results):
+        if isinstance(res_or_exc, Exception):
+            print(f"Unexpected error while updating {path}: {res_or_exc!r}")
+        elif res_or_exc is not None:
+            successful_updates.append(res_or_exc)
+    return successful_updates
+
+
+_TOP_CHANGES_PROMPT_TEMPLATE = string.Template("""**Role:** You are a Chief Strategy Officer reporting directly to your company's founders.
 
     **Your Company's Context:**
-    {company_context}
+    ${company_context}
 
     **Task:**
     You have received the following intelligence briefings on recent competitor activities. Your job is to synthesize this information into a high-level executive summary. Identify the **top 10 most strategically important changes** that your company's founders must be aware of.
 
     **Intelligence Briefings:**
     ---
-    {combined_changes_text}
+    ${combined_changes_text}
     ---
 
     **Instructions:**
@@ -743,17 +1639,199 @@ async def generate_top_changes_summary_async(
     - Format the output as a clean, markdown-formatted, numbered list.
     - Do NOT include a headline - start directly with the numbered list.
     - Each list item should be concise and clearly state the competitor, the change, and the strategic implication for your company (the 'so what?').
+    """)
+
+async def generate_top_changes_summary_async(
+    all_changes: List[str],
+    company_context: str
+) -> str:
+    """
+    Takes a list of individual competitor change summaries and synthesizes them
+    into a top-10 executive briefing for the company's founders.
     """
-    model = generative_models.GenerativeModel("gemini-2.5-flash")
+    if not all_changes:
+        return "No significant competitor updates found in this run."
+
+    # Create a simple request_args without a search tool, as it's not needed.
+    request_args = {"generation_config": _UPDATE_CONFIG}
+
+    combined_changes_text = "\n\n".join(all_changes)
+    prompt = _TOP_CHANGES_PROMPT_TEMPLATE.substitute(
+        company_context=company_context,
+        combined_changes_text=combined_changes_text
+    )
+    model = _get_model()
     try:
-        response = await model.generate_content_async([prompt], **request_args)
-        return response.text
+        async with _llm_slot():
+            response = await model.generate_content_async(prompt, **request_args)
+        return _extract_text(response)
     except Exception as e:
         print(f"Error generating top changes summary: {e}")
         return "Error: Could not generate the final summary."
 
 
 
+# Notion accepts at most 100 blocks per children.append call and ~500KB per request,
+# and at most 100 rich text parts per block.
+NOTION_MAX_BLOCKS_PER_REQUEST = 100
+NOTION_MAX_REQUEST_BYTES = 500_000
+NOTION_MAX_RICH_TEXT_PARTS = 100
+
+def _heading_block(heading_type: str, text: str) -> Dict[str, Any]:
+    return {
+        "object": "block",
+        "type": heading_type,
+        heading_type: {"rich_text": [{"type": "text", "text": {"content": text}}]}
+    }
+
+def _paragraph_block(rich_text: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "object": "block",
+        "type": "paragraph",
+        "paragraph": {"rich_text": rich_text}
+    }
+
+def _split_long_rich_text_parts(
+    rich_text_parts: List[Dict[str, Any]],
+    limit: int = NOTION_RICH_TEXT_LIMIT
+) -> Iterator[Dict[str, Any]]:
+    """Splits any part longer than `limit` into several parts with the same annotations."""
+    for part in rich_text_parts:
+        content = part["text"]["content"]
+        if len(content) <= limit:
+            yield part
+            continue
+        for i in range(0, len(content), limit):
+            yield {**part, "text": {**part["text"], "content": content[i:i + limit]}}
+
+def _chunk_rich_text_parts(
+    rich_text_parts: List[Dict[str, Any]],
+    limit: int = NOTION_RICH_TEXT_LIMIT,
+    max_parts: int = NOTION_MAX_RICH_TEXT_PARTS
+) -> Iterator[List[Dict[str, Any]]]:
+    """Lazily groups rich text parts so each group holds at most `limit` characters and `max_parts` parts."""
+    parts = list(_split_long_rich_text_parts(rich_text_parts, limit))
+    # Groups are slices of `parts` between window boundaries; only the running length is tracked.
+    start = 0
+    window_length = 0
+    for index, part in enumerate(parts):
+        part_length = len(part["text"]["content"])
+        if index > start and (window_length + part_length > limit or index - start >= max_parts):
+            yield parts[start:index]
+            start = index
+            window_length = 0
+        window_length += part_length
+    if start < len(parts):
+        yield parts[start:]
+
+# Markdown used in the LLM summaries: **bold** spans and "1. " style numbered items.
+_SUMMARY_TOKEN_RE = re.compile(r"\*\*(.*?)\*\*|\d+\.\s")
+
+def _summary_to_rich_text(content: str) -> List[Dict[str, Any]]:
+    """
+    Converts summary text to Notion rich_text parts in a single pass: **text** is rendered
+    in bold, and each numbered item after the first starts on a new line.
+    """
+    parts = []
+    plain: List[str] = []  # plain text since the last bold span, emitted as one part
+    numbered = False
+    last_end = 0
+
+    def flush_plain(strip_end: bool = False) -> None:
+        text = "".join(plain)
+        if strip_end:
+            text = text.rstrip()
+        if text:
+            parts.append({"type": "text", "text": {"content": text}})
+        plain.clear()
+
+    for match in _SUMMARY_TOKEN_RE.finditer(content):
+        plain.append(content[last_end:match.start()])
+        last_end = match.end()
+        bold_text = match.group(1)
+        if bold_text is None:
+            # Minimal spacing between numbered items
+            if numbered:
+                plain.append("\n")
+            numbered = True
+            plain.append(match.group())
+        else:
+            flush_plain()
+            if bold_text:
+                parts.append({"type": "text", "text": {"content": bold_text}, "annotations": {"bold": True}})
+
+    plain.append(content[last_end:])
+    flush_plain(strip_end=numbered)
+    return parts
+
+def build_text_section_blocks(
+    title: str,
+    content: str,
+    subtitle: str | None = "Top 10 Strategic Competitor Updates"
+) -> List[Dict[str, Any]]:
+    """
+    Builds the Notion blocks for a titled text section: a heading (plus an optional
+    subheading) and the content as paragraphs, with numbered items spaced out and
+    **text** rendered in bold.
+    """
+    blocks = [_heading_block("heading_1", title)]
+    if subtitle:
+        blocks.append(_heading_block("heading_2", subtitle))
+    blocks.extend(build_paragraph_blocks(_summary_to_rich_text(content)))
+    return blocks
+
+def build_paragraph_blocks(rich_text_parts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Builds one paragraph per group of rich text parts, to respect Notion's per-block limits."""
+    return [_paragraph_block(chunk) for chunk in _chunk_rich_text_parts(rich_text_parts)]
+
+
+def _batch_blocks_for_notion(blocks: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Splits blocks into ordered batches that fit Notion's per-request block count and size limits."""
+    batches: List[List[Dict[str, Any]]] = []
+    current_batch: List[Dict[str, Any]] = []
+    current_size = 0
+    for block in blocks:
+        block_size = len(json.dumps(block))
+        if current_batch and (len(current_batch) >= NOTION_MAX_BLOCKS_PER_REQUEST
+                              or current_size + block_size > NOTION_MAX_REQUEST_BYTES):
+            batches.append(current_batch)
+            current_batch = []
+            current_size = 0
+        current_batch.append(block)
+        current_size += block_size
+    if current_batch:
+        batches.append(current_batch)
+    return batches
+
+
+async def append_blocks_to_notion_page_async(
+    notion_client: AsyncClient,
+    page_id: str,
+    blocks: List[Dict[str, Any]]
+) -> bool:
+    """
+    Appends blocks to a Notion page using as few requests as the API limits allow.
+    Batches are sent in order (not concurrently) so the blocks keep their position on the page;
+    a rate-limited batch is retried rather than dropped, so later batches never land before it.
+    Returns True if every batch was appended.
+    """
+    rate_controller = _RateController(1, maximum=1)
+    try:
+        for batch in _batch_blocks_for_notion(blocks):
+            await _notion_call(
+                rate_controller,
+                notion_client.blocks.children.append,
+                block_id=page_id,
+                children=batch
+            )
+        return True
+    except APIResponseError as e:
+        print(f"Error appending to Notion page: {e.body}")
+    except Exception as e:
+        print(f"An unexpected error occurred while appending to Notion: {e}")
+    return False
+
+
 async def append_text_to_notion_page_async(
     notion_client: AsyncClient,
     page_id: str,
@@ -762,155 +1840,68 @@ async def append_text_to_notion_page_async(
 ):
     """Appends a title and a block of text to a Notion page."""
     print(f"Appending summary to Notion page: {page_id}")
-    try:
-        # Add minimal spacing between numbered items and convert **text** to bold
-        import re
-        
-        # First, convert **text** to bold formatting for Notion
-        def parse_bold_text(text):
-            """Parse text with **bold** markdown into Notion rich_text format"""
-            parts = []
-            # Split by **text** patterns while preserving the delimiters
-            bold_pattern = r'(\*\*.*?\*\*)'
-            segments = re.split(bold_pattern, text)
-            
-            for segment in segments:
-                if segment.startswith('**') and segment.endswith('**'):
-                    # Bold text (remove the **)
-                    bold_text = segment[2:-2]
-                    if bold_text:
-                        parts.append({"type": "text", "text": {"content": bold_text}, "annotations": {"bold": True}})
-                elif segment:
-                    # Regular text
-                    parts.append({"type": "text", "text": {"content": segment}})
-            return parts
-        
-        # Split content by numbered items (1., 2., etc.) and add minimal spacing
-        numbered_pattern = r'(\d+\.\s)'
-        parts = re.split(numbered_pattern, content)
-        
-        if len(parts) > 1:
-            # Reconstruct with single line spacing between items
-            spaced_content = parts[0]  # Any content before first number
-            for i in range(1, len(parts), 2):
-                if i + 1 < len(parts):
-                    spaced_content += parts[i] + parts[i + 1] + "\n"
-            content = spaced_content.rstrip()
-        
-        # Parse content into rich text with bold formatting
-        rich_text_parts = parse_bold_text(content)
-
-        blocks_to_append = [
-            {
-                "object": "block",
-                "type": "heading_1",
-                "heading_1": {
-                    "rich_text": [{"type": "text", "text": {"content": title}}]
-                }
-            },
-            {
-                "object": "block",
-                "type": "heading_2",
-                "heading_2": {
-                    "rich_text": [{"type": "text", "text": {"content": "Top 10 Strategic Competitor Updates"}}]
-                }
-            }
-        ]
-        
-        # Create a single paragraph block with rich text formatting
-        if rich_text_parts:
-            # Split rich text parts into chunks to respect Notion's limits
-            current_chunk = []
-            current_length = 0
-            
-            for part in rich_text_parts:
-                part_length = len(part["text"]["content"])
-                if current_length + part_length > 2000 and current_chunk:
-                    # Add current chunk as a paragraph
-                    blocks_to_append.append({
-                        "object": "block",
-                        "type": "paragraph",
-                        "paragraph": {"rich_text": current_chunk}
-                    })
-                    current_chunk = [part]
-                    current_length = part_length
-                else:
-                    current_chunk.append(part)
-                    current_length += part_length
-            
-            # Add remaining chunk
-            if current_chunk:
-                blocks_to_append.append({
-                    "object": "block",
-                    "type": "paragraph",
-                    "paragraph": {"rich_text": current_chunk}
-                })
-
-        await notion_client.blocks.children.append(
-            block_id=page_id,
-            children=blocks_to_append
-        )
+    if await append_blocks_to_notion_page_async(notion_client, page_id, build_text_section_blocks(title, content)):
         print("Successfully appended summary to Notion page.")
-    except APIResponseError as e:
-        print(f"Error appending to Notion page: {e.body}")
-    except Exception as e:
-        print(f"An unexpected error occurred while appending to Notion: {e}")
 
 
 def dedupe_sources_preserve_order(sources: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Return sources deduplicated by URL, preserving original order."""
-    seen: set[str] = set()
-    unique: List[Dict[str, Any]] = []
+    # Dicts keep insertion order, so one mapping serves as both the seen-set and the result.
+    unique: Dict[str, Dict[str, Any]] = {}
     for src in sources or []:
-        if isinstance(src, dict):
-            url = src.get("url")
-            if url and url not in seen:
-                seen.add(url)
-                unique.append(src)
-    return unique
-
-
-def build_inline_source_refs(unique_sources: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Build Notion rich_text parts like [1] [2] ... each linked to its source URL."""
-    parts: List[Dict[str, Any]] = []
-    for idx, src in enumerate(unique_sources, start=1):
-        url = src.get("url")
-        if not url:
-            continue
-        parts.append({
-            "type": "text",
-            "text": {"content": f"[{idx}] ", "link": {"url": url}}
-        })
-    return parts
+        if isinstance(src, dict) and (url := src.get("url")) and url not in unique:
+            unique[url] = src
+    return list(unique.values())
 
 
+# Upper bound on inline source links per competitor paragraph on the summary page.
+MAX_INLINE_SOURCE_REFS = 20
 
-async def discover_new_competitors_async(
-    days_ago: int,
-    existing_competitors: List[str],
-    company_context: str
-) -> List[str]:
-    """
-    Scans for new potential competitors that have emerged recently.
-    """
-    print(f"\nSearching for new competitors...")
+def build_inline_source_refs(
+    unique_sources: List[Dict[str, Any]],
+    max_refs: int = MAX_INLINE_SOURCE_REFS
+) -> List[Dict[str, Any]]:
+    """Build Notion rich_text parts like [1] [2] ... each linked to its source URL, at most `max_refs` of them."""
+    # Numbering follows the source's position, so sources without a URL leave a gap.
+    refs = (
+        {"type": "text", "text": {"content": f"[{idx}] ", "link": {"url": url}}}
+        for idx, url in enumerate((src.get("url") for src in unique_sources), start=1)
+        if url
+    )
+    return list(itertools.islice(refs, max_refs))
 
-    # Create a simple, generic search tool configuration inside the function.
-    search_tool = Tool.from_dict({"google_search": {}})
 
-    request_args = {
-        "generation_config": GenerationConfig(temperature=0.5, top_p=1.0),
-        "tools": [search_tool]
-    }
 
-    # The prompt still uses `days_ago` as a helpful guideline for the model.
-    prompt = f"""**Role:** You are a Market Intelligence Analyst. Your task is to identify emerging startups that could be potential competitors to your company.
+# Upper bound on known competitor names listed in the discovery prompt, to keep its token count bounded.
+MAX_KNOWN_COMPETITORS_IN_PROMPT = 200
+
+@functools.lru_cache(maxsize=16)
+def _format_known_competitors(names: frozenset[str]) -> str:
+    """
+    Normalizes, dedupes (case-insensitively) and sorts competitor names into the
+    comma-separated list used by the discovery prompt, truncated to
+    MAX_KNOWN_COMPETITORS_IN_PROMPT names.
+    """
+    unique_names: Dict[str, str] = {}
+    for name in names:
+        normalized = " ".join(name.split())
+        if normalized:
+            key = normalized.casefold()
+            # Pick the same spelling every run (frozenset order varies), so the prompt and its cache key are stable.
+            unique_names[key] = min(unique_names.get(key, normalized), normalized)
+    sorted_names = [unique_names[key] for key in sorted(unique_names)]
+    if len(sorted_names) > MAX_KNOWN_COMPETITORS_IN_PROMPT:
+        remaining = len(sorted_names) - MAX_KNOWN_COMPETITORS_IN_PROMPT
+        sorted_names = sorted_names[:MAX_KNOWN_COMPETITORS_IN_PROMPT] + [f"...and {remaining} more"]
+    return ", ".join(sorted_names)
+
+_DISCOVERY_PROMPT_TEMPLATE = string.Template("""**Role:** You are a Market Intelligence Analyst. Your task is to identify emerging startups that could be potential competitors to your company.
 
     **Your Company's Context:**
-    {company_context}
+    ${company_context}
 
     **Objective:**
-    Identify new companies, startups, or open-source projects that have been announced, funded, or gained traction recently (e.g., in the last {days_ago} days). These new entities must be relevant to your company's mission and target market.
+    Identify new companies, startups, or open-source projects that have been announced, funded, or gained traction recently (e.g., in the last ${days_ago} days). These new entities must be relevant to your company's mission and target market.
 
     **Search Focus Areas:**
     Based on your company's context, search for relevant terms related to:
@@ -922,27 +1913,59 @@ async def discover_new_competitors_async(
 
     **CRITICAL Instructions:**
     1.  **Analyze Relevance:** A new company is relevant if it targets your company's customer base, aims to solve similar problems (especially with similar technology approaches), and addresses the same business challenges mentioned in your company context.
-    2.  **Exclude Known Competitors:** Do NOT include any of the following known companies in your response: {', '.join(existing_competitors)}
+    2.  **Exclude Known Competitors:** Do NOT include any of the following known companies in your response: ${existing_competitors_text}
     3.  **Output Format:** Your response MUST be a single, valid JSON object containing a single key "new_competitors", which is a list of strings (company names).
     4.  **No Hallucinations:** If you cannot find any new, relevant competitors after a thorough search, return an empty list.
 
     **Example Output:**
     ```
-    {{
+    {
       "new_competitors": ["PropManagify AI", "FincaTech Solutions"]
-    }}
+    }
     ```
+    """)
+
+async def discover_new_competitors_async(
+    days_ago: int,
+    existing_competitors: List[str],
+    company_context: str
+) -> List[str]:
+    """
+    Scans for new potential competitors that have emerged recently.
+    Results are cached for the day (see DISCOVERY_CACHE_DIR); an empty lookback window
+    returns immediately without calling the model.
     """
+    if days_ago <= 0:
+        print("Discovery lookback window is empty. Skipping new competitor discovery.")
+        return []
 
-    model = generative_models.GenerativeModel("gemini-2.5-flash")
-    try:
-        response = await model.generate_content_async([prompt], **request_args)
-        response_text = "".join(part.text for part in response.candidates[0].content.parts).strip()
+    print(f"\nSearching for new competitors...")
+
+    request_args = {
+        "generation_config": _DISCOVERY_CONFIG,
+        "tools": [_SEARCH_TOOL]
+    }
 
-        if response_text.startswith("```json"):
-            response_text = response_text[7:-3].strip()
+    # The prompt still uses `days_ago` as a helpful guideline for the model.
+    prompt = _DISCOVERY_PROMPT_TEMPLATE.substitute(
+        company_context=company_context,
+        days_ago=days_ago,
+        existing_competitors_text=_format_known_competitors(frozenset(existing_competitors))
+    )
 
-        parsed_response = json.loads(response_text)
+    cache_path = _daily_cache_path(DISCOVERY_CACHE_DIR, prompt)
+    try:
+        cached = await asyncio.to_thread(_read_json_file, cache_path)
+        print(f"Using today's cached discovery results ({len(cached['new_competitors'])} potential new competitors).")
+        return cached["new_competitors"]
+    except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError):
+        pass
+
+    model = _get_model()
+    try:
+        async with _llm_slot():
+            response = await model.generate_content_async(prompt, **request_args)
+        parsed_response = _parse_json_response(response)
         new_competitors = parsed_response.get("new_competitors", [])
 
         if not isinstance(new_competitors, list):
@@ -950,8 +1973,44 @@ async def discover_new_competitors_async(
             return []
             
         print(f"Discovery complete. Found {len(new_competitors)} potential new competitors.")
+        try:
+            await asyncio.to_thread(_write_json_file, cache_path, {"new_competitors": new_competitors})
+        except OSError as cache_err:
+            print(f"Warning: Could not cache discovery results: {cache_err}")
         return new_competitors
 
     except (json.JSONDecodeError, Exception) as e:
         print(f"An error occurred during new competitor discovery: {e}")
-        return []
\ No newline at end of file
+        return []
+
+
+async def run_competitor_refresh_async(
+    json_file_paths: List[str],
+    existing_competitors: List[str],
+    company_context: str,
+    days_ago: int
+) -> Tuple[List[Tuple[str, str]], str, List[str]]:
+    """
+    Runs a full refresh as one structured-concurrency pipeline: new competitor discovery
+    runs alongside the per-competitor updates, and the top 10 summary is generated as soon
+    as the updates are done (overlapping with any remaining discovery work).
+    Returns (successful_updates, top_changes_summary, newly_discovered_competitors).
+    """
+    async def _update_and_summarize() -> Tuple[List[Tuple[str, str]], str]:
+        successful_updates = await update_all_competitors_async(json_file_paths, company_context)
+        change_summaries = [summary for _, summary in successful_updates]
+        if change_summaries:
+            print("\nGenerating final executive summary of top changes...")
+        top_changes_summary = await generate_top_changes_summary_async(change_summaries, company_context)
+        return successful_updates, top_changes_summary
+
+    async with asyncio.TaskGroup() as tg:
+        discovery_task = tg.create_task(discover_new_competitors_async(
+            days_ago=days_ago,
+            existing_competitors=existing_competitors,
+            company_context=company_context
+        ))
+        update_task = tg.create_task(_update_and_summarize())
+
+    successful_updates, top_changes_summary = update_task.result()
+    return successful_updates, top_changes_summary, discovery_task.result()